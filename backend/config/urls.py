@@ -17,7 +17,9 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from tickets.views import TicketViewSet, ticket_stats, classify_ticket
+from tickets.views import (
+    TicketViewSet, batch_operations, classify_ticket, llm_usage_summary, metrics_view, ticket_stats,
+)
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -25,7 +27,10 @@ router.register(r'tickets', TicketViewSet, basename='ticket')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/tickets/stats/', ticket_stats, name='ticket-stats'),
     path('api/tickets/classify/', classify_ticket, name='ticket-classify'),
+    path('api/llm-usage/', llm_usage_summary, name='llm-usage'),
+    path('api/batch/', batch_operations, name='batch'),
     path('api/', include(router.urls)),
 ]
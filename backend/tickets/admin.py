@@ -1,12 +1,110 @@
 from django.contrib import admin
-from .models import Ticket
+from django.core.paginator import Paginator
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.functional import cached_property
+from .models import ArchivedTicket, Ticket
+from .slow_queries import recorder
 
 
-@admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
-    """Admin interface for Ticket model."""
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an unbounded COUNT(*).
+    Unfiltered PostgreSQL tables use the planner's estimate from pg_class.reltuples;
+    filtered or small tables are counted exactly, up to COUNT_LIMIT rows.
+    """
+
+    # Below this many rows an exact count is cheap enough
+    ESTIMATE_THRESHOLD = 10000
+
+    # Filtered counts stop here, so later pages of a huge result set are not reachable
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 (PG 14+) or 0 until the table has been analyzed
+            if row and row[0] >= self.ESTIMATE_THRESHOLD:
+                return int(row[0])
+        return queryset.order_by()[:self.COUNT_LIMIT].count()
+
+
+class ScalableTicketAdmin(admin.ModelAdmin):
+    """
+    Changelist settings that keep page loads bounded on large ticket tables:
+    estimated counts, no second full count, date drill-down on the indexed
+    created_at column, and search by id or title prefix instead of a
+    description scan.
+    """
     list_display = ['id', 'title', 'category', 'priority', 'status', 'created_at']
-    list_filter = ['category', 'priority', 'status', 'created_at']
-    search_fields = ['title', 'description']
+    list_filter = ['category', 'priority', 'status']
+    date_hierarchy = 'created_at'
+    search_fields = ['title']
+    search_help_text = 'Search by ticket id or the start of the title.'
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search by exact id for numeric terms, otherwise by title prefix
+        (istartswith, served by the UPPER(title) pattern index on PostgreSQL).
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+        return queryset.filter(title__istartswith=term), False
+
+
+@admin.register(Ticket)
+class TicketAdmin(ScalableTicketAdmin):
+    """Admin interface for Ticket model."""
+
+    def get_urls(self):
+        """Add the slow-query log under the ticket admin."""
+        urls = [
+            path(
+                'slow-queries/',
+                self.admin_site.admin_view(self.slow_queries_view),
+                name='tickets_ticket_slow_queries',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def slow_queries_view(self, request):
+        """Show the slow queries captured by this process, newest first."""
+        if request.method == 'POST' and 'clear' in request.POST:
+            recorder.clear()
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Slow queries',
+            'opts': self.model._meta,
+            'entries': recorder.snapshot(),
+            'threshold_ms': round(recorder.threshold * 1000),
+            'capacity': recorder.entries.maxlen,
+        }
+        return TemplateResponse(request, 'admin/tickets/slow_queries.html', context)
+
+
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(ScalableTicketAdmin):
+    """Read-only admin interface for archived tickets."""
+    list_display = ScalableTicketAdmin.list_display + ['archived_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,158 @@
+"""
+Admission control for LLM classification.
+A rate limiter hands out call slots at LLM_RATE_LIMIT_PER_SECOND. A request that
+cannot have a slot immediately waits for a reserved one, but only if fewer than
+LLM_QUEUE_MAX_SIZE requests are already waiting and the wait is at most
+LLM_QUEUE_MAX_WAIT_SECONDS; otherwise it is rejected at once and the caller
+returns the default classification instead of queueing up behind upstream 429s.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+
+admission_wait = metrics.REGISTRY.histogram(
+    'llm_admission_wait_seconds',
+    'Time classification requests waited for a rate-limit slot.',
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+admission_rejections = metrics.REGISTRY.counter(
+    'llm_admission_rejections_total',
+    'Classification requests answered with defaults because of admission control, by reason.',
+    ['reason'],
+)
+admission_queue_depth = metrics.REGISTRY.gauge(
+    'llm_admission_queue_depth',
+    'Classification requests currently waiting for a rate-limit slot.',
+)
+
+
+class TokenBucket:
+    """
+    Per-process token bucket holding up to `burst` tokens, refilled at `rate` per second.
+    Reservations may take the balance negative: the debt is how long later callers wait,
+    which makes queued requests leave in arrival order.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """Reserve one token; return seconds until it is usable, or None (nothing reserved) if over max_wait."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+
+class CacheWindowLimiter:
+    """
+    Limiter shared by every process using the same cache: at most `rate * window`
+    calls per `window`-second slot, counted with atomic cache increments. A request
+    that finds the current slot full reserves a place in the next slot with room.
+    Needs a shared cache backend (e.g. Redis or Memcached) for the `default` alias;
+    with the in-memory cache it is per process.
+    """
+
+    def __init__(self, rate, window=1.0, cache_alias='default', key_prefix='llm-rate'):
+        self.limit = max(1, int(rate * window))
+        self.window = window
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    def reserve(self, max_wait):
+        cache = caches[self.cache_alias]
+        now = time.time()
+        slot = int(now // self.window)
+        for ahead in range(int(math.ceil(max_wait / self.window)) + 1):
+            start = (slot + ahead) * self.window
+            wait = max(0.0, start - now)
+            if wait > max_wait:
+                return None
+            key = f'{self.key_prefix}:{slot + ahead}'
+            timeout = int(math.ceil(self.window * (ahead + 2)))
+            cache.add(key, 0, timeout=timeout)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                # Evicted between add() and incr(): start the slot again
+                cache.set(key, 1, timeout=timeout)
+                count = 1
+            if count <= self.limit:
+                return wait
+        return None
+
+
+class AdmissionController:
+    """Bounded wait queue in front of a limiter."""
+
+    def __init__(self, limiter, max_queue, max_wait):
+        self.limiter = limiter
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """Block until the request may call the LLM and return True, or return False at once if rejected."""
+        with self.lock:
+            if self.waiting >= self.max_queue:
+                admission_rejections.inc(reason='queue_full')
+                return False
+            wait = self.limiter.reserve(self.max_wait)
+            if wait is None:
+                admission_rejections.inc(reason='rate_limited')
+                return False
+            if wait > 0:
+                self.waiting += 1
+                admission_queue_depth.set(self.waiting)
+
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+                    admission_queue_depth.set(self.waiting)
+        admission_wait.observe(wait)
+        return True
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Process-wide controller built from settings, or None when rate limiting is disabled."""
+    global _controller
+    rate = getattr(settings, 'LLM_RATE_LIMIT_PER_SECOND', 0)
+    if rate <= 0:
+        return None
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                if getattr(settings, 'LLM_RATE_LIMIT_SCOPE', 'process') == 'shared':
+                    limiter = CacheWindowLimiter(rate)
+                else:
+                    limiter = TokenBucket(rate, getattr(settings, 'LLM_RATE_LIMIT_BURST', rate))
+                _controller = AdmissionController(
+                    limiter,
+                    max_queue=getattr(settings, 'LLM_QUEUE_MAX_SIZE', 20),
+                    max_wait=getattr(settings, 'LLM_QUEUE_MAX_WAIT_SECONDS', 2.0),
+                )
+    return _controller
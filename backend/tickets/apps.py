@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class TicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tickets'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from .list_cache import connect_signals
+        connect_signals()
+
+        if getattr(settings, 'DUPLICATE_DETECTION_ENABLED', True):
+            from django.db.models.signals import post_save
+            from .models import Ticket
+            from .signals import index_ticket_description
+            post_save.connect(index_ticket_description, sender=Ticket, dispatch_uid='tickets.duplicates')
+
+        if getattr(settings, 'SLOW_QUERY_ENABLED', True):
+            from .slow_queries import install
+            connection_created.connect(install, dispatch_uid='tickets.slow_queries')
@@ -0,0 +1,211 @@
+"""
+Batch execution of API operations in one HTTP request.
+Each operation is dispatched to the view its path resolves to, so validation,
+caching, replica routing and LLM admission control (enforced by LLMClassifier)
+apply as they would to a separate request. Sub-requests do NOT pass through the
+MIDDLEWARE stack: sessions, CSRF, CORS, security headers and compression apply
+once, to the batch request. The per-request hooks that must see every operation
+are run explicitly around each view (see SUB_REQUEST_MIDDLEWARE), so each one
+shows up in the route metrics, slow-request log and slow-query tags.
+Consecutive read operations run concurrently on a small thread pool; a write is
+a barrier, so every operation sees the effects of the writes listed before it.
+In atomic mode everything runs in order inside one transaction, which is rolled
+back if any operation fails.
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections, transaction
+from django.urls import Resolver404, resolve
+
+from .middleware import MetricsMiddleware, SlowQueryMiddleware
+from .routers import SAFE_METHODS
+
+
+logger = logging.getLogger(__name__)
+
+
+ALLOWED_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Response headers passed through to each operation's result
+FORWARDED_RESPONSE_HEADERS = ('ETag', 'Location', 'X-Cache')
+
+# Request headers an operation may set, e.g. {"If-Match": "\"3\""}
+FORWARDED_REQUEST_HEADERS = ('If-Match', 'If-None-Match', 'Accept')
+
+# Middleware run around each operation's view, outermost first
+SUB_REQUEST_MIDDLEWARE = (MetricsMiddleware, SlowQueryMiddleware)
+
+
+class BatchError(ValueError):
+    """The batch as a whole is malformed; nothing was executed."""
+
+
+def parse_operations(data):
+    """Validate the request body and return (operations, atomic); raises BatchError."""
+    if not isinstance(data, dict) or not isinstance(data.get('operations'), list):
+        raise BatchError('Expected {"operations": [...]}')
+    operations = data['operations']
+    if not operations:
+        raise BatchError('operations must not be empty')
+    limit = getattr(settings, 'BATCH_MAX_OPERATIONS', 20)
+    if len(operations) > limit:
+        raise BatchError(f'At most {limit} operations are allowed per batch')
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise BatchError(f'Operation {index} must be an object')
+        method = str(operation.get('method', 'GET')).upper()
+        path = operation.get('path')
+        if method not in ALLOWED_METHODS:
+            raise BatchError(f'Operation {index}: method must be one of {", ".join(ALLOWED_METHODS)}')
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            raise BatchError(f'Operation {index}: path must start with /api/')
+        headers = operation.get('headers') or {}
+        if not isinstance(headers, dict) or set(headers) - set(FORWARDED_REQUEST_HEADERS):
+            raise BatchError(f'Operation {index}: headers may only include {", ".join(FORWARDED_REQUEST_HEADERS)}')
+        parsed.append({
+            'id': operation.get('id', index),
+            'method': method,
+            'path': path,
+            'body': operation.get('body'),
+            'headers': headers,
+        })
+    return parsed, bool(data.get('atomic', False))
+
+
+def build_request(parent, operation):
+    """Build a sub-request carrying the parent's client identity and credentials."""
+    url = urlsplit(operation['path'])
+    body = b'' if operation['body'] is None else json.dumps(operation['body']).encode()
+    environ = {
+        key: value for key, value in parent.META.items()
+        if key.startswith('HTTP_') or key in ('REMOTE_ADDR', 'SERVER_NAME', 'SERVER_PORT', 'wsgi.url_scheme')
+    }
+    environ.pop('HTTP_IF_MATCH', None)
+    environ.pop('HTTP_IF_NONE_MATCH', None)
+    environ.update({
+        'REQUEST_METHOD': operation['method'],
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    })
+    for name, value in operation['headers'].items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = str(value)
+    request = WSGIRequest(environ)
+    # The batch request itself already passed CSRF checks
+    request._dont_enforce_csrf_checks = True
+    return request
+
+
+def sub_request_handler():
+    """
+    Return a callable that runs a resolved sub-request through SUB_REQUEST_MIDDLEWARE
+    and its view, the way Django's handler runs a top-level request.
+    """
+    view_hooks = []
+
+    def call_view(request):
+        match = request.resolver_match
+        for hook in view_hooks:
+            hook(request, match.func, match.args, match.kwargs)
+        return match.func(request, *match.args, **match.kwargs)
+
+    handler = call_view
+    for middleware_class in reversed(SUB_REQUEST_MIDDLEWARE):
+        handler = middleware_class(handler)
+        if hasattr(handler, 'process_view'):
+            view_hooks.insert(0, handler.process_view)
+    return handler
+
+
+def execute(parent, operation, batch_view):
+    """Run one operation and return its result dict."""
+    result = {'id': operation['id']}
+    try:
+        match = resolve(urlsplit(operation['path']).path)
+    except Resolver404:
+        return {**result, 'status': 404, 'body': {'detail': 'Not found.'}}
+    if match.func is batch_view:
+        return {**result, 'status': 400, 'body': {'error': 'Batches cannot be nested'}}
+
+    request = build_request(parent, operation)
+    request.resolver_match = match
+    try:
+        response = sub_request_handler()(request)
+    except Exception:
+        # One broken operation must not turn the whole batch into a 500 and hide
+        # the results of writes that already committed
+        logger.exception("Batch operation %s %s failed", operation['method'], operation['path'])
+        return {**result, 'status': 500, 'body': {'detail': 'Internal server error'}}
+    if hasattr(response, 'render'):
+        response.render()
+    if hasattr(response, 'data'):
+        body = response.data
+    else:
+        body = response.content.decode(response.charset or 'utf-8')
+    headers = {name: response[name] for name in FORWARDED_RESPONSE_HEADERS if response.has_header(name)}
+    result.update(status=response.status_code, body=body)
+    if headers:
+        result['headers'] = headers
+    return result
+
+
+def _execute_in_thread(parent, operation, batch_view):
+    try:
+        return execute(parent, operation, batch_view)
+    finally:
+        # Pool threads get their own connections; don't leave them open
+        connections.close_all()
+
+
+def run_batch(parent, operations, atomic, batch_view):
+    """
+    Execute `operations` and return (results, committed). An operation whose view
+    raises gets status 500. In atomic mode the first failing operation (status >= 400)
+    rolls everything back and the rest are skipped.
+    """
+    if atomic:
+        results = []
+        with transaction.atomic():
+            for position, operation in enumerate(operations):
+                result = execute(parent, operation, batch_view)
+                results.append(result)
+                if result['status'] >= 400:
+                    transaction.set_rollback(True)
+                    results.extend(
+                        {'id': skipped['id'], 'status': 424, 'body': {'error': 'Skipped: batch rolled back'}}
+                        for skipped in operations[position + 1:]
+                    )
+                    return results, False
+        return results, True
+
+    results = []
+    workers = getattr(settings, 'BATCH_MAX_CONCURRENCY', 4)
+    position = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while position < len(operations):
+            operation = operations[position]
+            if operation['method'] not in SAFE_METHODS:
+                results.append(execute(parent, operation, batch_view))
+                position += 1
+                continue
+            # Run the whole run of consecutive reads at once
+            end = position
+            while end < len(operations) and operations[end]['method'] in SAFE_METHODS:
+                end += 1
+            reads = operations[position:end]
+            if len(reads) == 1 or workers <= 1:
+                results.extend(execute(parent, read, batch_view) for read in reads)
+            else:
+                results.extend(pool.map(lambda read: _execute_in_thread(parent, read, batch_view), reads))
+            position = end
+    return results, True
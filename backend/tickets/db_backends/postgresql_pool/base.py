@@ -0,0 +1,50 @@
+"""
+PostgreSQL backend whose connections come from tickets.db_pool.
+Django opens a connection the first time a thread queries and closes it at the
+end of the request (CONN_MAX_AGE is 0 with this backend); here opening borrows
+from the process-wide pool and closing hands the connection back, rolled back
+and ready for the next thread.
+"""
+import functools
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+
+from tickets import db_pool
+
+from .creation import DatabaseCreation
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        # Test setup switches NAME to the test database; keep its connections apart
+        key = (self.alias, repr(sorted(conn_params.items())))
+        return db_pool.get_pool(key, name=self.alias)
+
+    def get_new_connection(self, conn_params):
+        connect = functools.partial(super().get_new_connection, conn_params)
+        # Short-lived maintenance connections (creating/dropping the test database)
+        if self.alias == NO_DB_ALIAS:
+            self.pool = None
+            return connect()
+        self.pool = self.get_pool(conn_params)
+        try:
+            return self.pool.acquire(connect)
+        except db_pool.PoolTimeout as e:
+            # Surfaces as django.db.OperationalError
+            raise self.Database.OperationalError(str(e)) from e
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = getattr(self, 'pool', None)
+        if pool is None:
+            return super()._close()
+        if self.in_atomic_block:
+            # Django keeps referring to a connection closed inside atomic() until
+            # the block exits, so it must not be handed to another thread
+            with self.wrap_database_errors:
+                return pool.discard(self.connection, 'closed_in_transaction')
+        pool.release(self.connection)
@@ -0,0 +1,11 @@
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgreSQLDatabaseCreation
+
+from tickets import db_pool
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled idle connections to the test database would block DROP DATABASE
+        db_pool.close_idle_connections()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,198 @@
+"""
+SQLite backend tuned for concurrent threads on a single node.
+Every connection runs in WAL mode with synchronous=NORMAL, memory-mapped reads
+and a busy timeout, so readers never wait for a writer. Writers still have to
+take turns, and SQLite doesn't queue them fairly: a transaction that read before
+writing fails with "database is locked" if another thread committed in between.
+So writes in this process go through one FIFO writer queue: a transaction
+(atomic block) joins the queue and starts with BEGIN IMMEDIATE, and a write in
+autocommit mode holds its place only for that statement. Reads outside
+transactions skip the queue.
+
+The turn is process-wide and held until the transaction ends, whether or not it
+writes: a read-only atomic() block waits behind writers too, and while an atomic
+batch (POST /api/batch/ with "atomic": true) or a claim_next_ticket() attempt
+runs, every other write in the process waits for it. Keep transactions short,
+and read outside them where possible.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.backends.sqlite3.base import SQLiteCursorWrapper
+
+from tickets import metrics
+
+
+writer_wait_seconds = metrics.REGISTRY.histogram(
+    'sqlite_writer_wait_seconds',
+    'Time spent waiting for a turn in the SQLite writer queue.',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+writer_queue_depth = metrics.REGISTRY.gauge(
+    'sqlite_writer_queue_depth',
+    'Threads waiting for a turn in the SQLite writer queue.',
+)
+writer_timeouts = metrics.REGISTRY.counter(
+    'sqlite_writer_timeouts_total',
+    'Writes that gave up waiting for the SQLite writer queue.',
+)
+
+# Statements that never write; anything else takes a turn in the writer queue
+READ_PREFIXES = ('SELECT', 'PRAGMA', 'EXPLAIN')
+
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+class WriterQueue:
+    """First-come, first-served lock shared by all writers to one database file."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.owner = None
+        self.waiters = deque()
+
+    def acquire(self, owner, timeout):
+        """Wait up to `timeout` seconds for `owner`'s turn; returns False on timeout."""
+        started = time.monotonic()
+        with self.condition:
+            if self.owner is None and not self.waiters:
+                self.owner = owner
+                writer_wait_seconds.observe(0)
+                return True
+            self.waiters.append(owner)
+            writer_queue_depth.set(len(self.waiters))
+            try:
+                while self.owner is not None or self.waiters[0] is not owner:
+                    remaining = started + timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.waiters.remove(owner)
+                        # The next waiter may be first in line now
+                        self.condition.notify_all()
+                        writer_timeouts.inc()
+                        return False
+                    self.condition.wait(remaining)
+                self.waiters.popleft()
+                self.owner = owner
+            finally:
+                writer_queue_depth.set(len(self.waiters))
+        writer_wait_seconds.observe(time.monotonic() - started)
+        return True
+
+    def release(self, owner):
+        with self.condition:
+            if self.owner is owner:
+                self.owner = None
+                self.condition.notify_all()
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_writer_queue(name):
+    with _queues_lock:
+        return _queues.setdefault(str(name), WriterQueue())
+
+
+class WriterQueueCursorWrapper(SQLiteCursorWrapper):
+
+    def execute(self, query, params=None):
+        with self.wrapper.write_turn(query):
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        with self.wrapper.write_turn(query):
+            return super().executemany(query, param_list)
+
+
+class _WriteTurn:
+    __slots__ = ('wrapper', 'write')
+
+    def __init__(self, wrapper, write):
+        self.wrapper = wrapper
+        self.write = write
+
+    def __enter__(self):
+        if self.write:
+            self.wrapper.acquire_writer()
+
+    def __exit__(self, *exc_info):
+        # An autocommit write is committed by now; a transaction keeps its turn
+        if self.write and not self.wrapper.connection.in_transaction:
+            self.wrapper.release_writer()
+
+
+class DatabaseWrapper(SQLiteDatabaseWrapper):
+    holds_writer = False
+
+    def get_new_connection(self, conn_params):
+        synchronous = getattr(settings, 'SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ImproperlyConfigured(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS_LEVELS)}")
+        conn = super().get_new_connection(conn_params)
+        conn.execute(f"PRAGMA busy_timeout = {int(getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+        # Persistent in the database file; in-memory test databases stay in "memory" mode
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA synchronous = {synchronous}')
+        conn.execute(f"PRAGMA mmap_size = {int(getattr(settings, 'SQLITE_MMAP_SIZE', 268435456))}")
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=WriterQueueCursorWrapper)
+        cursor.wrapper = self
+        return cursor
+
+    @property
+    def writer_queue(self):
+        return get_writer_queue(self.settings_dict['NAME'])
+
+    def write_turn(self, query):
+        write = not self.holds_writer and not query.lstrip()[:7].upper().startswith(READ_PREFIXES)
+        return _WriteTurn(self, write)
+
+    def acquire_writer(self):
+        if self.holds_writer:
+            return
+        timeout = getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000
+        if not self.writer_queue.acquire(self, timeout):
+            # Surfaces as django.db.OperationalError, like SQLite's own lock timeout
+            raise self.Database.OperationalError('database is locked (timed out in the writer queue)')
+        self.holds_writer = True
+
+    def release_writer(self):
+        if self.holds_writer:
+            self.holds_writer = False
+            self.writer_queue.release(self)
+
+    def _start_transaction_under_autocommit(self):
+        # Take the write lock up front: a deferred transaction that reads first
+        # can't upgrade to a writer once another connection has committed
+        self.acquire_writer()
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self.release_writer()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            if self.connection is None or not self.connection.in_transaction:
+                self.release_writer()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_writer()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_writer()
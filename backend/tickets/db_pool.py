@@ -0,0 +1,267 @@
+"""
+In-process database connection pool.
+Django's persistent connections (CONN_MAX_AGE) are per thread, so a threaded or
+async server keeps one idle connection open for every worker thread it ever ran.
+With the pooled backend (tickets.db_backends.postgresql_pool) a thread borrows a
+connection for the length of a request and hands it back afterwards, so a process
+never holds more than DB_POOL_MAX_SIZE connections. Callers wait up to
+DB_POOL_TIMEOUT_SECONDS for one to come free, connections idle for longer than
+DB_POOL_MAX_IDLE_SECONDS are closed, and with DB_POOL_PRE_PING each checkout
+first runs SELECT 1 so a connection the server dropped is replaced, not handed out.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+pool_connections = metrics.REGISTRY.gauge(
+    'db_pool_connections',
+    'Open pooled database connections.',
+    labelnames=('pool', 'state'),
+)
+pool_wait_seconds = metrics.REGISTRY.histogram(
+    'db_pool_acquire_wait_seconds',
+    'Time spent waiting to check a connection out of the pool.',
+    labelnames=('pool',),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+pool_timeouts = metrics.REGISTRY.counter(
+    'db_pool_timeouts_total',
+    'Checkouts that gave up because the pool stayed exhausted.',
+    labelnames=('pool',),
+)
+pool_opened = metrics.REGISTRY.counter(
+    'db_pool_connections_opened_total',
+    'Database connections opened by the pool.',
+    labelnames=('pool',),
+)
+pool_closed = metrics.REGISTRY.counter(
+    'db_pool_connections_closed_total',
+    'Pooled database connections closed, by reason.',
+    labelnames=('pool', 'reason'),
+)
+
+
+class PoolTimeout(Exception):
+    """No connection came free within the pool's timeout."""
+
+
+def ping(connection):
+    """Return True if `connection` can still run a query."""
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+        return True
+    except Exception:
+        return False
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def reset(connection):
+    """Roll back anything left open; returns False if the connection is broken."""
+    if getattr(connection, 'closed', False):
+        return False
+    try:
+        connection.rollback()
+        return True
+    except Exception:
+        return False
+
+
+class ConnectionPool:
+
+    def __init__(self, name='default', max_size=10, timeout=5.0, max_idle=300.0, pre_ping=True,
+                 ping=ping, reset=reset, clock=time.monotonic):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.pre_ping = pre_ping
+        self.ping = ping
+        self.reset = reset
+        self.clock = clock
+        self.condition = threading.Condition()
+        # (connection, idle since); checkouts take the most recently used end
+        self.idle = deque()
+        # Connections open, idle or checked out
+        self.size = 0
+        self.reaper = None
+
+    @property
+    def in_use(self):
+        return self.size - len(self.idle)
+
+    def acquire(self, connect):
+        """
+        Check out a connection, opening one with `connect()` if the pool is below
+        max_size. Raises PoolTimeout if none is available within the timeout.
+        """
+        started = self.clock()
+        deadline = started + self.timeout
+        while True:
+            connection = None
+            with self.condition:
+                while True:
+                    expired = self._take_expired()
+                    if self.idle:
+                        connection, _idle_since = self.idle.pop()
+                        break
+                    if self.size < self.max_size:
+                        self.size += 1
+                        break
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        pool_timeouts.inc(pool=self.name)
+                        self._update_gauges()
+                        raise PoolTimeout(
+                            f'No connection available in pool {self.name!r} '
+                            f'({self.max_size} in use) after {self.timeout:g}s'
+                        )
+                    self.condition.wait(remaining)
+                self._update_gauges()
+            self._close_all(expired, 'idle')
+
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self._discard_slot()
+                    raise
+                pool_opened.inc(pool=self.name)
+            elif self.pre_ping and not self.ping(connection):
+                self.discard(connection, 'ping_failed')
+                continue
+            pool_wait_seconds.observe(self.clock() - started, pool=self.name)
+            self._start_reaper()
+            return connection
+
+    def release(self, connection):
+        """Return a checked-out connection; broken ones are closed instead of pooled."""
+        if not self.reset(connection):
+            self.discard(connection, 'broken')
+            return
+        with self.condition:
+            self.idle.append((connection, self.clock()))
+            self._update_gauges()
+            self.condition.notify()
+
+    def reap(self):
+        """Close connections idle for longer than max_idle; returns how many were closed."""
+        with self.condition:
+            expired = self._take_expired()
+            self._update_gauges()
+        self._close_all(expired, 'idle')
+        return len(expired)
+
+    def close_idle(self):
+        """Close every idle connection, e.g. before dropping the database."""
+        with self.condition:
+            expired = [connection for connection, _idle_since in self.idle]
+            self.idle.clear()
+            self.size -= len(expired)
+            self._update_gauges()
+            self.condition.notify_all()
+        self._close_all(expired, 'closed')
+
+    def stats(self):
+        with self.condition:
+            return {'size': self.size, 'idle': len(self.idle), 'in_use': self.in_use, 'max_size': self.max_size}
+
+    def _take_expired(self):
+        # Caller holds the condition; the oldest idle connections are at the left
+        expired = []
+        if not self.max_idle:
+            return expired
+        cutoff = self.clock() - self.max_idle
+        while self.idle and self.idle[0][1] <= cutoff:
+            expired.append(self.idle.popleft()[0])
+        if expired:
+            self.size -= len(expired)
+            self.condition.notify(len(expired))
+        return expired
+
+    def _discard_slot(self):
+        with self.condition:
+            self.size -= 1
+            self._update_gauges()
+            self.condition.notify()
+
+    def discard(self, connection, reason='discarded'):
+        """Close a checked-out connection instead of returning it."""
+        self._discard_slot()
+        self._close_all([connection], reason)
+
+    def _close_all(self, connections, reason):
+        for connection in connections:
+            pool_closed.inc(pool=self.name, reason=reason)
+            try:
+                connection.close()
+            except Exception as e:
+                logger.debug("Error closing pooled connection: %s", e)
+
+    def _update_gauges(self):
+        pool_connections.set(len(self.idle), pool=self.name, state='idle')
+        pool_connections.set(self.in_use, pool=self.name, state='in_use')
+
+    def _start_reaper(self):
+        # Checkouts and returns reap too, but an idle process would otherwise keep
+        # its connections open forever
+        if self.reaper is not None or not self.max_idle:
+            return
+        with self.condition:
+            if self.reaper is None:
+                self.reaper = threading.Thread(target=self._reap_forever, name=f'db-pool-reaper-{self.name}', daemon=True)
+                self.reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(max(self.max_idle / 2, 1.0))
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error("Connection pool reaper failed: %s", e)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, name='default'):
+    """
+    The process-wide pool for `key` (one per database alias and connection
+    parameters), sized from the DB_POOL_* settings.
+    """
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(
+                    name=name,
+                    max_size=getattr(settings, 'DB_POOL_MAX_SIZE', 10),
+                    timeout=getattr(settings, 'DB_POOL_TIMEOUT_SECONDS', 5.0),
+                    max_idle=getattr(settings, 'DB_POOL_MAX_IDLE_SECONDS', 300.0),
+                    pre_ping=getattr(settings, 'DB_POOL_PRE_PING', True),
+                )
+    return pool
+
+
+def close_idle_connections():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
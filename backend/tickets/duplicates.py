@@ -0,0 +1,176 @@
+"""
+Near-duplicate detection for ticket descriptions using MinHash and LSH.
+
+Each description is reduced to a set of word shingles and summarised by a
+MinHash signature of NUM_PERM values, computed for all permutations at once
+with NumPy. The signature is split into BANDS bands of ROWS values; each band
+is hashed into a bucket stored in an indexed column. Tickets sharing any bucket
+are candidates, and only those candidates have their signatures compared. A
+lookup therefore costs BANDS index probes plus a handful of comparisons,
+regardless of how many tickets exist.
+
+NumPy is imported on first use rather than at module import, so workers that never
+index or look up a description don't pay for loading it at startup.
+"""
+import functools
+import re
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Ticket, TicketLSHBucket, TicketSignature
+
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Tickets sharing a bucket have Jaccard similarity around (1 / BANDS) ** (1 / ROWS) ~= 0.42
+# or more with high probability; candidates are then filtered by estimated similarity.
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_parameters():
+    """Return (prime, a, b, band seeds) as NumPy arrays for the MinHash permutations."""
+    import numpy as np
+    # Fixed seed: signatures stored in the database must stay comparable across processes
+    rng = np.random.RandomState(20240217)
+    perm_a = rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+    perm_b = rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+    band_seeds = rng.randint(1, 1 << 31, size=BANDS).astype(np.uint64)
+    return np.uint64(_MERSENNE_PRIME), perm_a, perm_b, band_seeds
+
+
+def shingles(text):
+    """Return the set of word SHINGLE_SIZE-grams of the normalized text."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """
+    Return the MinHash signature of `text` as a uint32 array of NUM_PERM values,
+    or None if it has no words. All permutations are applied in one (NUM_PERM x shingles) matrix op.
+    """
+    import numpy as np
+    grams = shingles(text)
+    if not grams:
+        return None
+    prime, perm_a, perm_b, _band_seeds = _hash_parameters()
+    hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+    # (a * x + b) mod p; a < 2^31 and x < 2^32, so the product fits in uint64
+    permuted = (np.outer(perm_a, hashes) + perm_b[:, None]) % prime
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """
+    Hash each band of the signature into one signed 64-bit bucket id.
+    A per-band seed keeps equal rows in different bands from sharing a bucket.
+    """
+    import numpy as np
+    bands = signature.reshape(BANDS, ROWS).astype(np.uint64)
+    buckets = _hash_parameters()[3].copy()
+    with np.errstate(over='ignore'):
+        for column in range(ROWS):
+            buckets = buckets * np.uint64(1000003) ^ bands[:, column]
+    return buckets.view(np.int64).tolist()
+
+
+def similarity(signature, others):
+    """Estimated Jaccard similarity of `signature` against each row of `others`."""
+    return (others == signature).mean(axis=1)
+
+
+def index_ticket(ticket):
+    """Store (or replace) the signature and LSH buckets for one ticket."""
+    signature = minhash(ticket.description)
+    with transaction.atomic():
+        TicketLSHBucket.objects.filter(ticket_id=ticket.pk).delete()
+        if signature is None:
+            TicketSignature.objects.filter(ticket_id=ticket.pk).delete()
+            return
+        TicketSignature.objects.update_or_create(
+            ticket_id=ticket.pk, defaults={'signature': signature.tobytes()}
+        )
+        TicketLSHBucket.objects.bulk_create(
+            TicketLSHBucket(ticket_id=ticket.pk, bucket=bucket) for bucket in band_buckets(signature)
+        )
+
+
+def build_index(batch_size=1000, rebuild=False):
+    """
+    Index every ticket without a signature (all tickets with rebuild=True), in batches.
+    Returns the number of tickets indexed.
+    """
+    if rebuild:
+        TicketLSHBucket.objects.all().delete()
+        TicketSignature.objects.all().delete()
+
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Ticket.objects.filter(pk__gt=last_id, signature__isnull=True)
+            .order_by('pk').only('id', 'description')[:batch_size]
+        )
+        if not batch:
+            return indexed
+        last_id = batch[-1].pk
+        indexed += index_new_tickets(batch)
+
+
+def index_new_tickets(tickets):
+    """
+    Index tickets that have no signature yet with two bulk inserts.
+    Returns the number of tickets indexed (tickets without words are skipped).
+    """
+    signatures = []
+    buckets = []
+    for ticket in tickets:
+        signature = minhash(ticket.description)
+        if signature is None:
+            continue
+        signatures.append(TicketSignature(ticket_id=ticket.pk, signature=signature.tobytes()))
+        buckets.extend(TicketLSHBucket(ticket_id=ticket.pk, bucket=bucket) for bucket in band_buckets(signature))
+    with transaction.atomic():
+        TicketSignature.objects.bulk_create(signatures)
+        TicketLSHBucket.objects.bulk_create(buckets)
+    return len(signatures)
+
+
+def find_duplicates(text, exclude_id=None, threshold=None, limit=10):
+    """
+    Return [(ticket_id, similarity), ...] for indexed tickets whose description
+    is estimated to be at least `threshold` similar to `text`, most similar first.
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'DUPLICATE_SIMILARITY_THRESHOLD', 0.5)
+    import numpy as np
+    signature = minhash(text)
+    if signature is None:
+        return []
+
+    candidates = TicketSignature.objects.filter(
+        ticket_id__in=TicketLSHBucket.objects.filter(bucket__in=band_buckets(signature)).values('ticket_id')
+    )
+    if exclude_id is not None:
+        candidates = candidates.exclude(ticket_id=exclude_id)
+    rows = list(candidates.values_list('ticket_id', 'signature'))
+    if not rows:
+        return []
+
+    ids = np.array([ticket_id for ticket_id, _ in rows])
+    others = np.frombuffer(b''.join(bytes(blob) for _, blob in rows), dtype=np.uint32).reshape(len(rows), NUM_PERM)
+    scores = similarity(signature, others)
+    keep = np.flatnonzero(scores >= threshold)
+    ranked = keep[np.argsort(-scores[keep], kind='stable')][:limit]
+    return [(int(ids[i]), round(float(scores[i]), 3)) for i in ranked]
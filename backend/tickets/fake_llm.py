@@ -0,0 +1,121 @@
+"""
+Local fake of the OpenAI chat-completions API for offline and load testing.
+Classifications are deterministic keyword matches on the ticket description, and
+latency and failures are injected from a seeded random generator, so a test run
+can be reproduced exactly. Start it with `python manage.py run_fake_llm` and point
+LLM_BACKENDS at it, e.g. `fake@http://localhost:8001/v1`.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# First matching keyword wins; descriptions matching nothing are general / medium
+CATEGORY_KEYWORDS = [
+    ('billing', ('invoice', 'charge', 'charged', 'refund', 'payment', 'billing', 'subscription', 'price')),
+    ('account', ('login', 'password', 'account', 'sign in', 'locked', 'username', 'profile')),
+    ('technical', ('error', 'crash', 'bug', 'slow', 'timeout', 'broken', 'not working', 'api', 'server')),
+]
+PRIORITY_KEYWORDS = [
+    ('critical', ('outage', 'down', 'data loss', 'security', 'breach', 'all users')),
+    ('high', ('urgent', 'asap', 'cannot', "can't", 'charged twice', 'blocked')),
+    ('low', ('question', 'feature request', 'suggestion', 'typo', 'when you can')),
+]
+
+_DESCRIPTION_RE = re.compile(r'Description: (.*?)\n\nRespond in JSON format', re.S)
+
+
+def classify(description):
+    """Deterministic (category, priority) for a description."""
+    text = description.lower()
+    category = next((name for name, words in CATEGORY_KEYWORDS if any(w in text for w in words)), 'general')
+    priority = next((name for name, words in PRIORITY_KEYWORDS if any(w in text for w in words)), 'medium')
+    return category, priority
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """
+    HTTP server answering POST /v1/chat/completions.
+    latency_ms +/- jitter_ms is slept before every response; failure_rate and
+    rate_limit_rate are the fractions of requests answered with 500 and 429.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0, jitter_ms=0, failure_rate=0.0, rate_limit_rate=0.0, seed=0):
+        super().__init__(address, FakeLLMHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.requests = 0
+
+    def next_behaviour(self):
+        """Return (delay_seconds, status) for the next request."""
+        with self.rng_lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self.rng.random()
+        if roll < self.failure_rate:
+            return delay, 500
+        if roll < self.failure_rate + self.rate_limit_rate:
+            return delay, 429
+        return delay, 200
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+            return self.send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            prompt = body['messages'][-1]['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            return self.send_json(400, {'error': {'message': 'Invalid request body', 'type': 'invalid_request_error'}})
+
+        delay, status = self.server.next_behaviour()
+        time.sleep(delay)
+        if status == 429:
+            return self.send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}})
+        if status != 200:
+            return self.send_json(status, {'error': {'message': 'Injected failure', 'type': 'server_error'}})
+
+        match = _DESCRIPTION_RE.search(prompt)
+        category, priority = classify(match.group(1) if match else prompt)
+        content = json.dumps({'category': category, 'priority': priority})
+        prompt_tokens = sum(len(message.get('content', '').split()) for message in body['messages'])
+        completion_tokens = len(content.split())
+        self.send_json(200, {
+            'id': f'fake-{self.server.requests}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        })
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Silence per-request access logs; load tests would flood the console
+        pass
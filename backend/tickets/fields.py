@@ -0,0 +1,63 @@
+"""
+Custom model fields for the tickets app.
+"""
+from django.core import exceptions
+from django.db import models
+
+
+class EnumField(models.PositiveSmallIntegerField):
+    """
+    Stores one of a fixed set of string choices as a small integer code.
+
+    Python, query and API values stay strings ('open', 'high', ...); only the
+    database column holds the code, which keeps rows and indexes small and makes
+    GROUP BY and ORDER BY compare integers. Codes are the 1-based position in
+    `choices`, so new choices must only ever be appended, never reordered.
+    """
+
+    def __init__(self, *args, choices=None, **kwargs):
+        if not choices:
+            raise ValueError('EnumField requires choices')
+        super().__init__(*args, choices=choices, **kwargs)
+        self.codes = {value: code for code, (value, _label) in enumerate(choices, start=1)}
+        self.values = {code: value for value, code in self.codes.items()}
+
+    @property
+    def validators(self):
+        # Skip IntegerField's range validators: values are strings, checked against choices
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.values.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in self.codes:
+            return value
+        if isinstance(value, int) and value in self.values:
+            return self.values[value]
+        raise exceptions.ValidationError(
+            self.error_messages['invalid_choice'],
+            code='invalid_choice',
+            params={'value': value},
+        )
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, int):
+            return value
+        if hasattr(value, 'resolve_expression'):
+            return value
+        try:
+            return self.codes[value]
+        except KeyError:
+            # Same error as to_python, so forms, serializers and callers filtering
+            # on user input can handle both the same way
+            raise exceptions.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,142 @@
+"""
+Group commit for ticket creation.
+When GROUP_COMMIT_ENABLED is on, concurrent creates in a process are coalesced:
+the first caller becomes the batch leader, waits up to GROUP_COMMIT_MAX_DELAY_MS
+(or until GROUP_COMMIT_MAX_BATCH tickets have joined), then inserts the whole batch
+with one bulk_create in one transaction on its own connection. The other callers
+block until that commit and get their own saved ticket back, so each request still
+answers 201 with its id. If the batch insert fails, every ticket is retried in its
+own transaction, so one bad row only fails its own request.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from . import duplicates, list_cache, metrics
+from .models import Ticket
+
+
+logger = logging.getLogger(__name__)
+
+group_commit_batch_size = metrics.REGISTRY.histogram(
+    'ticket_group_commit_batch_size',
+    'Tickets inserted per group commit.',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+group_commit_fallbacks = metrics.REGISTRY.counter(
+    'ticket_group_commit_fallbacks_total',
+    'Group commits whose batch insert failed and were retried row by row.',
+)
+
+
+class _Entry:
+    __slots__ = ('ticket', 'done', 'error')
+
+    def __init__(self, ticket):
+        self.ticket = ticket
+        self.done = threading.Event()
+        self.error = None
+
+
+class GroupCommitter:
+
+    def __init__(self, max_delay=0.005, max_batch=100):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.condition = threading.Condition()
+        # Batch still accepting tickets; the thread that opened it flushes it
+        self.open_batch = None
+
+    def submit(self, ticket):
+        """Insert `ticket` as part of a group commit; returns it saved, or raises its insert error."""
+        entry = _Entry(ticket)
+        with self.condition:
+            batch = self.open_batch
+            leader = batch is None
+            if leader:
+                batch = self.open_batch = []
+            batch.append(entry)
+            if len(batch) >= self.max_batch:
+                self.open_batch = None
+                self.condition.notify_all()
+
+        if leader:
+            deadline = time.monotonic() + self.max_delay
+            with self.condition:
+                while self.open_batch is batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.open_batch = None
+                        break
+                    self.condition.wait(remaining)
+            self.flush(batch)
+        else:
+            entry.done.wait()
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.ticket
+
+    def flush(self, batch):
+        try:
+            tickets = [entry.ticket for entry in batch]
+            for ticket in tickets:
+                # bulk_create skips save(), which normally derives the rank
+                ticket.priority_rank = Ticket.PRIORITY_RANKS.get(ticket.priority, 0)
+            try:
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(tickets)
+                    # What the post_save receivers do for single saves, batched
+                    if getattr(settings, 'DUPLICATE_DETECTION_ENABLED', True):
+                        duplicates.index_new_tickets(tickets)
+                group_commit_batch_size.observe(len(tickets))
+                list_cache.bump_generation()
+            except Exception as e:
+                group_commit_fallbacks.inc()
+                logger.warning("Group commit of %d tickets failed, retrying individually: %s", len(batch), e)
+                self.save_individually(batch)
+        finally:
+            for entry in batch:
+                entry.done.set()
+
+    def save_individually(self, batch):
+        for entry in batch:
+            entry.ticket.pk = None
+            entry.ticket._state.adding = True
+            try:
+                with transaction.atomic():
+                    entry.ticket.save()
+            except Exception as e:
+                entry.error = e
+
+
+_committer = None
+_committer_lock = threading.Lock()
+
+
+def get_committer():
+    global _committer
+    if _committer is None:
+        with _committer_lock:
+            if _committer is None:
+                _committer = GroupCommitter(
+                    max_delay=getattr(settings, 'GROUP_COMMIT_MAX_DELAY_MS', 5) / 1000,
+                    max_batch=getattr(settings, 'GROUP_COMMIT_MAX_BATCH', 100),
+                )
+    return _committer
+
+
+def create_ticket(**fields):
+    """
+    Create a ticket, through a group commit when GROUP_COMMIT_ENABLED is on and the
+    caller is not already inside a transaction (whose rollback would otherwise take
+    other requests' tickets with it).
+    """
+    ticket = Ticket(**fields)
+    if not getattr(settings, 'GROUP_COMMIT_ENABLED', False) or transaction.get_connection().in_atomic_block:
+        ticket.save()
+        return ticket
+    return get_committer().submit(ticket)
@@ -0,0 +1,140 @@
+"""
+Response cache for the ticket list endpoint.
+Entries are keyed on the normalized query string plus a global ticket-data
+generation. Every committed write replaces the generation with a new random
+token, which orphans all older entries at once (O(1) invalidation, no key
+scanning); the cache backend's eviction removes them over time.
+With read replicas, only lists read from the primary are stored: a lagging
+replica could otherwise cache pre-write rows under the new generation. Clients
+pinned to the primary after a write skip the lookup and always read the primary.
+"""
+import hashlib
+import pickle
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import metrics
+from .models import ArchivedTicket, Ticket
+from .routers import is_pinned, reads_from_replica
+
+
+CACHE_ALIAS = 'ticket_lists'
+GENERATION_KEY = 'ticket-data-generation'
+
+list_cache_requests = metrics.REGISTRY.counter(
+    'ticket_list_cache_requests_total',
+    'Ticket list cache lookups, by result (hit, miss, oversize).',
+    ['result'],
+)
+list_cache_hit_ratio = metrics.REGISTRY.gauge(
+    'ticket_list_cache_hit_ratio',
+    'Fraction of ticket list cache lookups served from the cache since process start.',
+)
+
+
+def is_enabled():
+    return getattr(settings, 'TICKET_LIST_CACHE_ENABLED', False)
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def new_generation():
+    # Random rather than a counter: a reset can never make old entries valid again,
+    # and concurrent bumps can't collapse into one value (cache.incr is a
+    # read-modify-write on the file-based cache)
+    return uuid.uuid4().hex
+
+
+def current_generation():
+    """Return the ticket-data generation, initializing it if the cache lost it."""
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, new_generation(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation(using=None, **kwargs):
+    """
+    Invalidate every cached list once the current transaction on `using` commits
+    (at once in autocommit mode). Bumping earlier would let a concurrent reader cache
+    the pre-commit rows under the new generation. Connected to Ticket/ArchivedTicket
+    saves and deletes; call it directly after queryset.update() or raw SQL writes,
+    which send no signals.
+    """
+    if not is_enabled():
+        return
+    transaction.on_commit(
+        lambda: get_cache().set(GENERATION_KEY, new_generation(), timeout=None),
+        using=using,
+    )
+
+
+def cache_key(request, generation):
+    """Build the key from the sorted query parameters, so parameter order doesn't matter."""
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ''
+    )
+    digest = hashlib.sha1(urlencode(params).encode()).hexdigest()
+    return f'ticket-list:{generation}:{digest}'
+
+
+def _record(result):
+    list_cache_requests.inc(result=result)
+    hits = list_cache_requests.value(result='hit')
+    lookups = hits + list_cache_requests.value(result='miss')
+    if lookups:
+        list_cache_hit_ratio.set(hits / lookups)
+
+
+def lookup(request):
+    """
+    Return (key, data) for the request. data is None on a miss; key is None when caching is off.
+    Clients pinned to the primary (read-your-writes) always miss, so an entry cached
+    before their write has replicated can't be served to them.
+    """
+    if not is_enabled():
+        return None, None
+    key = cache_key(request, current_generation())
+    if getattr(settings, 'DATABASE_REPLICAS', []) and is_pinned(request):
+        return key, None
+    payload = get_cache().get(key)
+    if payload is None:
+        _record('miss')
+        return key, None
+    _record('hit')
+    return key, pickle.loads(payload)
+
+
+def store(key, data):
+    """
+    Cache response data under `key`, unless it exceeds TICKET_LIST_CACHE_MAX_ENTRY_BYTES,
+    was read inside a transaction (e.g. an atomic batch), whose uncommitted rows
+    could still be rolled back, or was read from a replica that may lag behind the
+    generation's writes.
+    """
+    if key is None or transaction.get_connection().in_atomic_block or reads_from_replica():
+        return
+    payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) > getattr(settings, 'TICKET_LIST_CACHE_MAX_ENTRY_BYTES', 1024 * 1024):
+        list_cache_requests.inc(result='oversize')
+        return
+    get_cache().set(key, payload)
+
+
+def connect_signals():
+    """Bump the generation on every ticket save or delete. Called from TicketsConfig.ready()."""
+    for model in (Ticket, ArchivedTicket):
+        post_save.connect(bump_generation, sender=model, dispatch_uid=f'list_cache.save.{model.__name__}')
+        post_delete.connect(bump_generation, sender=model, dispatch_uid=f'list_cache.delete.{model.__name__}')
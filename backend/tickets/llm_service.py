@@ -1,49 +1,32 @@
 """
 LLM Classification Service for Support Tickets.
-Integrates with OpenAI API to suggest ticket categories and priorities.
+Suggests ticket categories and priorities through one or more OpenAI-compatible
+backends, chosen per request by a router that tracks their recent latency and errors.
+The OpenAI SDK is imported when the first backend is created, not at module import,
+so worker startup doesn't pay for it.
 """
+import hashlib
 import os
 import json
-from openai import OpenAI
+import logging
+import random
+import threading
+import time
+from collections import deque
 
+from django.conf import settings
+from django.core.cache import cache
 
-class LLMClassifier:
-    """
-    Classifier that uses LLM to suggest ticket category and priority.
-    Handles API errors gracefully and returns None on failure.
-    """
-    
-    def __init__(self):
-        """
-        Initialize with API key from environment variable.
-        If OPENAI_API_KEY is not set or invalid, client will be None
-        and classify_ticket will return None (graceful degradation).
-        """
-        self.api_key = os.environ.get('OPENAI_API_KEY')
-        self.client = None
-        if self.api_key:
-            try:
-                self.client = OpenAI(api_key=self.api_key)
-            except Exception as e:
-                # Log error but don't fail - allows system to work without LLM
-                print(f"OpenAI client initialization error: {e}")
-                self.client = None
-    
-    def classify_ticket(self, description):
-        """
-        Classify a ticket description and suggest category and priority.
-        
-        Args:
-            description (str): The ticket description to classify
-            
-        Returns:
-            dict: Dictionary with 'suggested_category' and 'suggested_priority' keys,
-                  or None if classification fails
-        """
-        if not self.client:
-            return None
-        
-        prompt = f"""Analyze this support ticket description and suggest:
+from . import metrics, usage
+from .admission import get_admission_controller
+
+
+logger = logging.getLogger(__name__)
+
+
+SYSTEM_PROMPT = "You are a support ticket classifier."
+
+PROMPT_TEMPLATE = """Analyze this support ticket description and suggest:
 1. Category (billing, technical, account, or general)
 2. Priority (low, medium, high, or critical)
 
@@ -51,31 +34,254 @@ Description: {description}
 
 Respond in JSON format:
 {{"category": "...", "priority": "..."}}"""
-        
+
+
+class BackendError(Exception):
+    """A backend call failed. `outcome` is the metrics label ('error', 'rate_limited' or 'invalid_response')."""
+
+    def __init__(self, message, outcome='error'):
+        super().__init__(message)
+        self.outcome = outcome
+
+
+class ClassifierBackend:
+    """
+    Base class for classification backends.
+    `classify` returns {'suggested_category', 'suggested_priority'} or raises BackendError.
+    """
+
+    name = 'backend'
+
+    def classify(self, description):
+        raise NotImplementedError
+
+
+class OpenAICompatibleBackend(ClassifierBackend):
+    """
+    Chat-completions backend for OpenAI or any server speaking the same HTTP API
+    (selected with `base_url`), including the bundled fake server in tickets.fake_llm.
+    """
+
+    def __init__(self, model, api_key, base_url=None, timeout=10.0):
+        self.model = model
+        self.base_url = base_url
+        self.name = f'{model}@{base_url}' if base_url else model
+        from openai import OpenAI
+        # No SDK retries: a failed call is reported to the router, which tries another backend
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+
+    def classify(self, description):
+        from openai import RateLimitError
+        start = time.perf_counter()
+        outcome = 'error'
+        prompt_tokens = completion_tokens = 0
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4",
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a support ticket classifier."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": PROMPT_TEMPLATE.format(description=description)}
                 ],
                 temperature=0.3,
                 max_tokens=100
             )
-            
-            # Parse the response content
+            if response.usage is not None:
+                prompt_tokens = response.usage.prompt_tokens
+                completion_tokens = response.usage.completion_tokens
             content = response.choices[0].message.content
-            result = json.loads(content)
-            
+            try:
+                result = json.loads(content)
+                suggestion = {
+                    'suggested_category': result['category'],
+                    'suggested_priority': result['priority']
+                }
+            except (TypeError, ValueError, KeyError) as e:
+                # The model answered, but not in the requested format
+                outcome = 'invalid_response'
+                raise BackendError(f'{self.name} returned an invalid response: {e}', outcome)
+            outcome = 'success'
+            return suggestion
+        except BackendError:
+            raise
+        except RateLimitError as e:
+            # Upstream 429: counted separately so admission limits can be tuned to the real quota
+            outcome = 'rate_limited'
+            raise BackendError(f'{self.name} rate limited: {e}', outcome)
+        except Exception as e:
+            raise BackendError(f'{self.name} request failed: {e}')
+        finally:
+            duration = time.perf_counter() - start
+            metrics.llm_request_duration.observe(duration, model=self.name, outcome=outcome)
+            metrics.llm_requests.inc(model=self.name, outcome=outcome)
+            usage.record(
+                outcome, duration, backend=self.name, model=self.model,
+                prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            )
+
+
+class LatencyRouter:
+    """
+    Sends each request to the backend with the lowest expected cost over a rolling
+    window of its recent calls: the p90 latency of its successful calls, plus
+    `failure_cost` seconds for each failure expected before a success. Failed calls
+    don't count towards latency, so a backend that fails fast can't look quick,
+    and a fast but flaky backend loses to a slower reliable one. Backends without
+    samples are tried first, and a small share of requests go to a random other
+    backend so a recovered backend is noticed. A failed call falls over to the next
+    backend, up to `max_attempts` backends per request.
+    """
+
+    def __init__(self, backends, window=50, explore_rate=0.05, max_attempts=2, failure_cost=10.0):
+        self.backends = list(backends)
+        self.explore_rate = explore_rate
+        # What a failure costs the caller: up to a timeout, then a failover
+        self.failure_cost = failure_cost
+        self.max_attempts = max_attempts
+        self.samples = {backend.name: deque(maxlen=window) for backend in self.backends}
+        self.lock = threading.Lock()
+
+    def score(self, name):
+        """Expected seconds per successful call; 0 for backends with no samples yet."""
+        samples = self.samples[name]
+        if not samples:
+            return 0.0
+        latencies = sorted(latency for latency, ok in samples if ok)
+        p90 = latencies[int(0.9 * (len(latencies) - 1))] if latencies else self.failure_cost
+        success_rate = max(len(latencies) / len(samples), 0.05)
+        # Failures expected before a success, for independent attempts
+        return p90 + self.failure_cost * (1 - success_rate) / success_rate
+
+    def ranked(self):
+        """Backends in the order they should be tried for the next request."""
+        with self.lock:
+            order = sorted(self.backends, key=lambda backend: self.score(backend.name))
+        if len(order) > 1 and random.random() < self.explore_rate:
+            order.insert(0, order.pop(random.randrange(1, len(order))))
+        return order
+
+    def record(self, name, latency, ok):
+        with self.lock:
+            self.samples[name].append((latency, ok))
+
+    def stats(self):
+        """Per-backend {'calls', 'error_rate', 'score'} over the current window."""
+        with self.lock:
             return {
-                'suggested_category': result['category'],
-                'suggested_priority': result['priority']
+                name: {
+                    'calls': len(samples),
+                    'error_rate': round(1 - sum(ok for _latency, ok in samples) / len(samples), 3) if samples else None,
+                    'score': round(self.score(name), 4),
+                }
+                for name, samples in self.samples.items()
             }
-        except json.JSONDecodeError as e:
-            # Log JSON parsing errors - LLM may have returned invalid format
-            print(f"LLM classification JSON parsing error: {e}")
-            return None
+
+    def classify(self, description):
+        """Return the first successful suggestion, or None if every attempted backend failed."""
+        for backend in self.ranked()[:self.max_attempts]:
+            start = time.perf_counter()
+            try:
+                result = backend.classify(description)
+            except BackendError as e:
+                self.record(backend.name, time.perf_counter() - start, False)
+                logger.warning("LLM classification error: %s", e)
+                continue
+            self.record(backend.name, time.perf_counter() - start, True)
+            return result
+        return None
+
+
+def build_backends(spec, api_key, timeout):
+    """
+    Create backends from a comma-separated LLM_BACKENDS value of "model" or "model@base_url"
+    entries. OpenAI entries are skipped without an API key; custom servers get a placeholder key.
+    """
+    backends = []
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        model, _, base_url = entry.partition('@')
+        if not base_url and not api_key:
+            continue
+        try:
+            backends.append(OpenAICompatibleBackend(
+                model, api_key or 'not-needed', base_url=base_url or None, timeout=timeout
+            ))
         except Exception as e:
-            # Log network errors and other exceptions - allows graceful degradation
-            print(f"LLM classification error: {e}")
+            # Log error but don't fail - allows system to work without LLM
+            logger.error("LLM backend %s initialization error: %s", entry, e)
+    return backends
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Process-wide router, so latency statistics persist across requests."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                backends = build_backends(
+                    getattr(settings, 'LLM_BACKENDS', 'gpt-4'),
+                    os.environ.get('OPENAI_API_KEY'),
+                    getattr(settings, 'LLM_TIMEOUT_SECONDS', 10.0),
+                )
+                _router = LatencyRouter(
+                    backends,
+                    window=getattr(settings, 'LLM_ROUTER_WINDOW', 50),
+                    explore_rate=getattr(settings, 'LLM_ROUTER_EXPLORE_RATE', 0.05),
+                    failure_cost=getattr(settings, 'LLM_TIMEOUT_SECONDS', 10.0),
+                )
+    return _router
+
+
+class LLMClassifier:
+    """
+    Classifier that uses LLM to suggest ticket category and priority.
+    Handles API errors gracefully and returns None on failure.
+    """
+
+    def __init__(self, router=None):
+        """
+        Use the process-wide router unless one is given.
+        If no backend is configured (e.g. OPENAI_API_KEY is not set), classify_ticket
+        returns None and the caller falls back to defaults (graceful degradation).
+        Calls pass through admission control (tickets.admission) when rate limiting is on.
+        """
+        self.router = router or get_router()
+        self.admission = get_admission_controller()
+
+    def classify_ticket(self, description):
+        """
+        Classify a ticket description and suggest category and priority.
+
+        Args:
+            description (str): The ticket description to classify
+
+        Returns:
+            dict: Dictionary with 'suggested_category' and 'suggested_priority' keys,
+                  or None if classification fails
+        """
+        if not self.router.backends:
+            metrics.llm_requests.inc(model='none', outcome='unavailable')
             return None
+
+        token = usage.new_request()
+        start = time.perf_counter()
+        try:
+            timeout = getattr(settings, 'LLM_CLASSIFICATION_CACHE_SECONDS', 0)
+            key = 'llm-classification:' + hashlib.sha1(description.strip().encode()).hexdigest()
+            if timeout:
+                result = cache.get(key)
+                if result is not None:
+                    usage.record('success', time.perf_counter() - start, cache_hit=True)
+                    return result
+
+            if self.admission is not None and not self.admission.admit():
+                usage.record('rejected', time.perf_counter() - start)
+                return None
+            result = self.router.classify(description)
+            if result is not None and timeout:
+                cache.set(key, result, timeout)
+            return result
+        finally:
+            usage.current_request_id.reset(token)
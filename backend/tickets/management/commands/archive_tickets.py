@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tickets.archive import archive_tickets
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    """Move old resolved/closed tickets from the live table into the archive."""
+
+    help = 'Archive resolved and closed tickets older than the retention window, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.TICKET_ARCHIVE_RETENTION_DAYS,
+            help='Archive tickets created more than this many days ago '
+                 '(default: TICKET_ARCHIVE_RETENTION_DAYS).',
+        )
+        parser.add_argument(
+            '--status',
+            action='append',
+            dest='statuses',
+            choices=[value for value, _label in Ticket.STATUS_CHOICES],
+            help='Status to archive; may be repeated (default: resolved and closed).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tickets moved per transaction (default: 1000).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many tickets would be archived.',
+        )
+
+    def handle(self, *args, **options):
+        count = archive_tickets(
+            older_than_days=options['older_than_days'],
+            statuses=options['statuses'] or ('resolved', 'closed'),
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {count} tickets.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from tickets.duplicates import build_index
+
+
+class Command(BaseCommand):
+    """Compute MinHash/LSH signatures for tickets that are not indexed yet."""
+
+    help = 'Build the near-duplicate index for existing tickets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tickets indexed per transaction (default: 1000).',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop the existing index and re-index every ticket.',
+        )
+
+    def handle(self, *args, **options):
+        count = build_index(batch_size=options['batch_size'], rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} tickets.'))
@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from tickets import admission, metrics
+from tickets.llm_service import LLMClassifier, get_router
+
+
+DESCRIPTIONS = [
+    'I was charged twice for my subscription this month',
+    'Cannot log in after resetting my password',
+    'The dashboard shows an error and crashes when exporting',
+    'Question about changing the name on my profile',
+    'Whole site is down for all users since this morning',
+    'Refund for the last invoice has not arrived yet',
+]
+
+
+class Command(BaseCommand):
+    """
+    Drive the configured classifier backends (LLM_BACKENDS) with concurrent requests
+    and report end-to-end latency percentiles and the router's per-backend statistics.
+    Pair with `run_fake_llm` for reproducible offline runs.
+    """
+
+    help = 'Load-test ticket classification through the backend router.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Total classifications (default: 200).')
+        parser.add_argument('--concurrency', type=int, default=10, help='Parallel callers (default: 10).')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for picking descriptions (default: 0).')
+
+    def handle(self, *args, **options):
+        router = get_router()
+        if not router.backends:
+            self.stderr.write('No classifier backend configured; set LLM_BACKENDS (and OPENAI_API_KEY for OpenAI).')
+            return
+        rng = random.Random(options['seed'])
+        descriptions = [rng.choice(DESCRIPTIONS) for _ in range(options['requests'])]
+        classifier = LLMClassifier(router)
+
+        def call(description):
+            start = time.perf_counter()
+            result = classifier.classify_ticket(description)
+            return (time.perf_counter() - start) * 1000, result is not None
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(call, descriptions))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ok in results)
+        failures = sum(not ok for _latency, ok in results)
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+        self.stdout.write(
+            f'{len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s), '
+            f'{failures} fell back to defaults'
+        )
+        self.stdout.write(
+            f'latency ms: p50 {statistics.median(latencies):.1f}  '
+            f'p95 {percentile(0.95):.1f}  p99 {percentile(0.99):.1f}  max {latencies[-1]:.1f}'
+        )
+        self.stdout.write(
+            f"admission rejections: {admission.admission_rejections.value(reason='queue_full'):.0f} queue full, "
+            f"{admission.admission_rejections.value(reason='rate_limited'):.0f} over wait budget"
+        )
+        self.stdout.write(f"{'backend':<40} {'calls':>6} {'errors':>7} {'score s':>8} {'429s':>6}")
+        for name, stats in router.stats().items():
+            error_rate = '-' if stats['error_rate'] is None else f"{stats['error_rate']:.1%}"
+            self.stdout.write(
+                f"{name:<40} {stats['calls']:>6} {error_rate:>7} {stats['score']:>8.3f} "
+                f"{metrics.llm_requests.value(model=name, outcome='rate_limited'):>6.0f}"
+            )
@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets.duplicates import build_index, find_duplicates
+from tickets.models import Ticket
+
+
+WORDS = (
+    'account login password reset email invoice charge refund billing payment card '
+    'error timeout server page slow crash upload download export report dashboard '
+    'mobile app browser update settings profile subscription plan upgrade cancel '
+    'notification message support access permission team user data sync api'
+).split()
+
+
+class Command(BaseCommand):
+    """
+    Measure near-duplicate lookup latency as the ticket table grows.
+    Synthetic tickets are created inside a transaction that is rolled back at the end,
+    so the benchmark leaves the database unchanged.
+    """
+
+    help = 'Benchmark near-duplicate lookup latency against table size.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,10000,50000',
+            help='Comma-separated table sizes to measure (default: 1000,10000,50000).',
+        )
+        parser.add_argument('--lookups', type=int, default=50, help='Lookups per size (default: 50).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0).')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"{'tickets':>10} {'p50 ms':>10} {'p95 ms':>10} {'matches':>10}")
+
+        with transaction.atomic():
+            created = 0
+            for size in sizes:
+                tickets = []
+                while created < size:
+                    tickets.append(Ticket(
+                        title=f'Benchmark ticket {created}',
+                        description=self.random_description(rng),
+                        category='technical',
+                        priority='medium',
+                        priority_rank=Ticket.PRIORITY_RANKS['medium'],
+                    ))
+                    created += 1
+                # bulk_create skips post_save, so index explicitly
+                Ticket.objects.bulk_create(tickets, batch_size=1000)
+                build_index()
+
+                timings = []
+                matches = 0
+                for _lookup in range(options['lookups']):
+                    text = self.random_description(rng)
+                    start = time.perf_counter()
+                    matches += len(find_duplicates(text))
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(
+                    f'{size:>10} {statistics.median(timings):>10.2f} {p95:>10.2f} '
+                    f'{matches / len(timings):>10.1f}'
+                )
+            transaction.set_rollback(True)
+
+    def random_description(self, rng):
+        # A quarter of tickets reuse one of a few incident texts, so real duplicates exist
+        if rng.random() < 0.25:
+            base = rng.randrange(20)
+            words = [WORDS[(base * 7 + i) % len(WORDS)] for i in range(20)]
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+            return ' '.join(words)
+        return ' '.join(rng.choice(WORDS) for _ in range(20))
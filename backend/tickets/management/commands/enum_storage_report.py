@@ -0,0 +1,98 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+
+TABLES = ('tickets_ticket', 'tickets_ticket_archive')
+ENUM_COLUMNS = ('category', 'priority', 'status')
+
+
+class Command(BaseCommand):
+    """
+    Report table size, index size and GROUP BY timings for the ticket tables.
+    Run it before and after `migrate tickets 0007` to measure the effect of
+    storing category/priority/status as small integer codes.
+    """
+
+    help = 'Report ticket table/index sizes and enum-column aggregate timings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias (default: default).')
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per aggregate (default: 5).')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        report = {'vendor': connection.vendor, 'tables': {}}
+        with connection.cursor() as cursor:
+            for table in TABLES:
+                table_bytes, index_bytes = self.sizes(cursor, connection.vendor, table)
+                report['tables'][table] = {
+                    'table_bytes': table_bytes,
+                    'index_bytes': index_bytes,
+                    'group_by_ms': {
+                        column: self.time_group_by(cursor, connection, table, column, options['runs'])
+                        for column in ENUM_COLUMNS
+                    },
+                }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"Database vendor: {report['vendor']}")
+        for table, stats in report['tables'].items():
+            self.stdout.write(f'\n{table}')
+            self.stdout.write(f"  table size: {self.format_bytes(stats['table_bytes'])}")
+            self.stdout.write(f"  index size: {self.format_bytes(stats['index_bytes'])}")
+            for column, ms in stats['group_by_ms'].items():
+                self.stdout.write(f'  GROUP BY {column}: {ms} ms (median of {options["runs"]})')
+
+    def sizes(self, cursor, vendor, table):
+        """Return (table bytes, index bytes), or (None, None) if the backend can't tell."""
+        try:
+            if vendor == 'postgresql':
+                # pg_partition_tree also covers the partitions of the archive table
+                cursor.execute(
+                    'SELECT COALESCE(SUM(pg_table_size(relid)), 0), COALESCE(SUM(pg_indexes_size(relid)), 0) '
+                    'FROM pg_partition_tree(%s::regclass)',
+                    [table]
+                )
+                return tuple(int(value) for value in cursor.fetchone())
+            if vendor == 'sqlite':
+                # Needs SQLite built with the dbstat virtual table
+                cursor.execute('SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = %s', [table])
+                table_bytes = cursor.fetchone()[0]
+                cursor.execute(
+                    "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [table]
+                )
+                return table_bytes, cursor.fetchone()[0]
+        except DatabaseError as e:
+            self.stderr.write(f'Could not measure size of {table}: {e}')
+        return None, None
+
+    def time_group_by(self, cursor, connection, table, column, runs):
+        """Median wall time of SELECT column, COUNT(*) ... GROUP BY column, in milliseconds."""
+        sql = (
+            f'SELECT {connection.ops.quote_name(column)}, COUNT(*) '
+            f'FROM {connection.ops.quote_name(table)} GROUP BY {connection.ops.quote_name(column)}'
+        )
+        timings = []
+        for _run in range(max(runs, 1)):
+            start = time.perf_counter()
+            cursor.execute(sql)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(timings), 3)
+
+    def format_bytes(self, value):
+        if value is None:
+            return 'n/a'
+        for unit in ('B', 'KB', 'MB', 'GB'):
+            if value < 1024 or unit == 'GB':
+                return f'{value:.1f} {unit}' if unit != 'B' else f'{value} B'
+            value /= 1024
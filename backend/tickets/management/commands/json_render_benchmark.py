@@ -0,0 +1,102 @@
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from tickets import renderers
+from tickets.models import Ticket
+from tickets.serializers import TicketSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    """
+    Compare DRF's stdlib JSON renderer with FastJSONRenderer on ticket lists of
+    several sizes, and report payload size and compression time for gzip and Brotli.
+    Tickets are built in memory, so the database is not touched.
+    """
+
+    help = 'Benchmark ticket list JSON encoding time and compressed payload sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10,100,1000,10000',
+            help='Comma-separated list lengths (default: 10,100,1000,10000).',
+        )
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per measurement (default: 5).')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write('orjson is not installed; FastJSONRenderer falls back to stdlib json.')
+        rng = random.Random(0)
+        report = []
+        for size in (int(size) for size in options['sizes'].split(',')):
+            data = TicketSerializer(self.tickets(size, rng), many=True).data
+            stdlib_ms, payload = self.time_it(lambda: JSONRenderer().render(data), options['runs'])
+            fast_ms, fast_payload = self.time_it(lambda: renderers.FastJSONRenderer().render(data), options['runs'])
+            assert json.loads(payload) == json.loads(fast_payload)
+            gzip_ms, gzipped = self.time_it(lambda: gzip.compress(fast_payload, compresslevel=6), options['runs'])
+            row = {
+                'tickets': size,
+                'stdlib_ms': stdlib_ms,
+                'fast_ms': fast_ms,
+                'raw_bytes': len(fast_payload),
+                'gzip_bytes': len(gzipped),
+                'gzip_ms': gzip_ms,
+            }
+            if brotli is not None:
+                br_ms, compressed = self.time_it(lambda: brotli.compress(fast_payload, quality=4), options['runs'])
+                row.update(br_bytes=len(compressed), br_ms=br_ms)
+            report.append(row)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{'tickets':>8} {'stdlib ms':>10} {'fast ms':>9} {'speedup':>8} {'raw KB':>9} "
+            f"{'gzip KB':>8} {'gzip ms':>8} {'br KB':>8} {'br ms':>7}"
+        )
+        for row in report:
+            self.stdout.write(
+                f"{row['tickets']:>8} {row['stdlib_ms']:>10.2f} {row['fast_ms']:>9.2f} "
+                f"{row['stdlib_ms'] / max(row['fast_ms'], 1e-6):>7.1f}x {row['raw_bytes'] / 1024:>9.1f} "
+                f"{row['gzip_bytes'] / 1024:>8.1f} {row['gzip_ms']:>8.2f} "
+                f"{row.get('br_bytes', 0) / 1024:>8.1f} {row.get('br_ms', 0):>7.2f}"
+            )
+
+    def tickets(self, count, rng):
+        words = 'login error invoice refund crash slow export password account billing page api'.split()
+        now = timezone.now()
+        return [
+            Ticket(
+                id=i + 1,
+                title=' '.join(rng.choice(words) for _ in range(5)).capitalize(),
+                description=' '.join(rng.choice(words) for _ in range(40)),
+                category=rng.choice(['billing', 'technical', 'account', 'general']),
+                priority=rng.choice(['low', 'medium', 'high', 'critical']),
+                status=rng.choice(['open', 'in_progress', 'resolved', 'closed']),
+                created_at=now - timedelta(minutes=i),
+                version=1,
+            )
+            for i in range(count)
+        ]
+
+    def time_it(self, func, runs):
+        """Return (median milliseconds, last result) over `runs` calls."""
+        timings = []
+        for _run in range(runs):
+            start = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(timings), 3), result
@@ -0,0 +1,55 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tickets.usage import summarize
+
+
+class Command(BaseCommand):
+    """Summarize the LLM usage ledger: latency percentiles, tokens per ticket and failure rates."""
+
+    help = 'Report LLM classification latency, token usage and failure rates over time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='Window to report on (default: 24).')
+        parser.add_argument(
+            '--bucket-minutes', type=float, default=60,
+            help='Length of each interval in the breakdown (default: 60).',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        report = summarize(
+            window=timedelta(hours=options['hours']),
+            bucket=timedelta(minutes=options['bucket_minutes']),
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"LLM usage from {report['since']} to {report['until']}")
+        self.write_header('model')
+        self.write_row('total', report['total'])
+        for model, summary in report['models'].items():
+            self.write_row(model, summary)
+        self.write_header('interval start')
+        for bucket in report['buckets']:
+            self.write_row(bucket['start'][:16], bucket)
+
+    def write_header(self, title):
+        self.stdout.write(
+            f"\n{title:<24} {'requests':>8} {'calls':>6} {'cached':>6} {'rejected':>8} "
+            f"{'failed':>7} {'p50 ms':>8} {'p95 ms':>8} {'tok/ticket':>10}"
+        )
+
+    def write_row(self, label, summary):
+        def show(value, fmt):
+            return '-' if value is None else format(value, fmt)
+
+        self.stdout.write(
+            f"{label:<24} {summary['requests']:>8} {summary['llm_calls']:>6} {summary['cache_hits']:>6} "
+            f"{summary['rejected']:>8} {show(summary['failure_rate'], '.1%'):>7} "
+            f"{show(summary['latency_p50_ms'], '.1f'):>8} {show(summary['latency_p95_ms'], '.1f'):>8} "
+            f"{show(summary['tokens_per_ticket'], '.1f'):>10}"
+        )
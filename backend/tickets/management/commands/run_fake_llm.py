@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from tickets.fake_llm import FakeLLMServer
+
+
+class Command(BaseCommand):
+    """Serve the deterministic fake LLM for offline and load testing."""
+
+    help = 'Run a local OpenAI-compatible fake classifier with injectable latency and failures.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1).')
+        parser.add_argument('--port', type=int, default=8001, help='Port to listen on (default: 8001).')
+        parser.add_argument('--latency-ms', type=float, default=200, help='Mean response latency (default: 200).')
+        parser.add_argument('--jitter-ms', type=float, default=50, help='Uniform latency jitter (default: 50).')
+        parser.add_argument(
+            '--failure-rate', type=float, default=0.0,
+            help='Fraction of requests answered with HTTP 500 (default: 0).',
+        )
+        parser.add_argument(
+            '--rate-limit-rate', type=float, default=0.0,
+            help='Fraction of requests answered with HTTP 429 (default: 0).',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for latency and failures (default: 0).')
+
+    def handle(self, *args, **options):
+        server = FakeLLMServer(
+            (options['host'], options['port']),
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            failure_rate=options['failure_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            seed=options['seed'],
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(
+            f'Fake LLM listening on http://{host}:{port}/v1 '
+            f'(use LLM_BACKENDS=fake@http://{host}:{port}/v1)'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,171 @@
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from tickets.models import Ticket
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[3]
+
+PROFILES = {
+    # The stock Django SQLite backend with a rollback journal
+    'stock': {'SQLITE_TUNED': 'False'},
+    'tuned': {'SQLITE_TUNED': 'True'},
+}
+
+
+class Command(BaseCommand):
+    """
+    Drive mixed read/write API traffic from many threads against a copy of the
+    SQLite database, once per profile, and compare throughput, read and write
+    latency and failed requests. Each profile runs in a fresh process on its own
+    copy, so the real database is never written to.
+    """
+
+    help = 'Benchmark concurrent API traffic on SQLite with the stock and tuned profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per profile (default: 2000).')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent clients (default: 16).')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of writes (default: 0.2).')
+        parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                            help='Profile to run; repeat for several (default: all).')
+        parser.add_argument('--seed', type=int, default=1)
+        # Set on the child process that generates the load
+        parser.add_argument('--worker', action='store_true', help='Internal: run the load in this process.')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            result = self.run_load(options['requests'], options['threads'], options['write_ratio'], options['seed'])
+            self.stdout.write(json.dumps(result))
+            return
+
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark needs the SQLite database (unset DATABASE_URL).')
+        self.stdout.write(
+            f"{'profile':<8} {'req/s':>8} {'read p50':>9} {'read p95':>9} "
+            f"{'write p50':>10} {'write p95':>10} {'errors':>7}"
+        )
+        for name in options['profile'] or sorted(PROFILES, reverse=True):
+            result = self.run_profile(name, options)
+            self.stdout.write(
+                f"{name:<8} {result['throughput']:>8.1f} {result['read_p50_ms']:>9.1f} {result['read_p95_ms']:>9.1f} "
+                f"{result['write_p50_ms']:>10.1f} {result['write_p95_ms']:>10.1f} {result['errors']:>7}"
+            )
+
+    def run_profile(self, name, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'benchmark.sqlite3')
+            source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+            target = sqlite3.connect(path)
+            source.backup(target)
+            source.close()
+            # The copy starts out in WAL mode if the source is; give the stock profile its default journal
+            target.execute('PRAGMA journal_mode = DELETE')
+            target.close()
+
+            env = {**os.environ, 'SQLITE_PATH': path, **PROFILES[name]}
+            env.pop('DATABASE_URL', None)
+            completed = subprocess.run(
+                [
+                    sys.executable, 'manage.py', 'sqlite_concurrency_benchmark', '--worker',
+                    '--requests', str(options['requests']), '--threads', str(options['threads']),
+                    '--write-ratio', str(options['write_ratio']), '--seed', str(options['seed']),
+                ],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=False,
+            )
+        if completed.returncode != 0:
+            raise CommandError(f'Benchmark run for {name} failed:\n{completed.stderr[-2000:]}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run_load(self, total, threads, write_ratio, seed):
+        # Make sure there is something to read and update
+        ids = list(Ticket.objects.values_list('pk', flat=True)[:500])
+        if len(ids) < 50:
+            for number in range(50 - len(ids)):
+                ids.append(Ticket.objects.create(
+                    title=f'Concurrency seed {number}', description='Seed ticket for the SQLite benchmark',
+                    category='general', priority='low',
+                ).pk)
+        connection.close()
+
+        rng = random.Random(seed)
+        plan = [(rng.random() < write_ratio, rng.choice(ids), rng.random()) for _ in range(total)]
+        latencies = {'read': [], 'write': []}
+        errors = []
+        lock = threading.Lock()
+        counter = iter(plan)
+        start_barrier = threading.Barrier(threads)
+
+        def worker():
+            # Count failed requests (e.g. "database is locked") instead of raising
+            client = Client(raise_request_exception=False)
+            start_barrier.wait()
+            try:
+                while True:
+                    with lock:
+                        step = next(counter, None)
+                    if step is None:
+                        return
+                    write, ticket_id, choice = step
+                    started = time.perf_counter()
+                    if write and choice < 0.5:
+                        response = client.post('/api/tickets/', {
+                            'title': 'Concurrency benchmark ticket',
+                            'description': 'Created by the SQLite concurrency benchmark',
+                            'category': 'technical',
+                            'priority': 'medium',
+                        }, content_type='application/json')
+                    elif write:
+                        response = client.patch(
+                            f'/api/tickets/{ticket_id}/',
+                            {'status': 'in_progress' if choice < 0.75 else 'open'},
+                            content_type='application/json',
+                        )
+                    elif choice < 0.5:
+                        response = client.get(f'/api/tickets/{ticket_id}/')
+                    else:
+                        response = client.get('/api/tickets/', {'status': 'open'})
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        latencies['write' if write else 'read'].append(elapsed)
+                        if response.status_code >= 400:
+                            errors.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        def percentile(values, fraction):
+            values = sorted(values)
+            if not values:
+                return 0.0
+            return values[min(len(values) - 1, int(len(values) * fraction))]
+
+        return {
+            'throughput': round(total / elapsed, 1),
+            'read_p50_ms': round(statistics.median(latencies['read'] or [0.0]), 1),
+            'read_p95_ms': round(percentile(latencies['read'], 0.95), 1),
+            'write_p50_ms': round(statistics.median(latencies['write'] or [0.0]), 1),
+            'write_p95_ms': round(percentile(latencies['write'], 0.95), 1),
+            'errors': len(errors),
+        }
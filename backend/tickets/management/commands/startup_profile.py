@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import startup
+
+
+class Command(BaseCommand):
+    """
+    Report worker cold-start cost: an -X importtime breakdown by top-level package
+    and the time from process start to the first successful response.
+    """
+
+    help = 'Measure import time and time to first request for a fresh worker process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tickets/', help='Request to serve (default: /api/tickets/).')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes to start (default: 3).')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list (default: 15).')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            import_ms, packages = startup.import_breakdown()
+            cold_start = startup.measure_cold_start(options['path'], options['runs'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        report = {
+            'import_ms': import_ms,
+            'packages': packages[:options['top']],
+            'cold_start': cold_start,
+            'budget_ms': startup.budget_ms(),
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f'Import time (self, by top-level package), total {import_ms} ms:')
+        for name, ms in report['packages']:
+            self.stdout.write(f'  {name:<24} {ms:>8.1f} ms')
+        self.stdout.write(
+            f"\nGET {cold_start['path']} -> {cold_start['status']} "
+            f"(median of {options['runs']} fresh processes)"
+        )
+        self.stdout.write(f"  application loaded: {cold_start['app_ms']:>8.1f} ms")
+        self.stdout.write(f"  first request:      {cold_start['request_ms']:>8.1f} ms")
+        self.stdout.write(f"  process start to response: {cold_start['total_ms']:.1f} ms (budget {report['budget_ms']} ms)")
+        if cold_start['imported_lazy_modules']:
+            self.stdout.write(self.style.WARNING(
+                f"  eagerly imported: {', '.join(cold_start['imported_lazy_modules'])}"
+            ))
@@ -0,0 +1,95 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from tickets.models import Ticket
+
+
+TITLE_PREFIX = 'Create benchmark'
+
+
+class Command(BaseCommand):
+    """
+    Fire concurrent POST /api/tickets/ requests with group commit off and on, and
+    compare throughput and per-request latency. Benchmark tickets are deleted afterwards.
+    """
+
+    help = 'Benchmark ticket creation throughput with and without group commit.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Tickets per mode (default: 1000).')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent clients (default: 16).')
+        parser.add_argument('--delay-ms', type=float, default=5, help='Group commit delay (default: 5).')
+        parser.add_argument('--max-batch', type=int, default=100, help='Group commit batch cap (default: 100).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'mode':<14} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+        )
+        try:
+            for label, enabled in (('per-request', False), ('group commit', True)):
+                with override_settings(
+                    GROUP_COMMIT_ENABLED=enabled,
+                    GROUP_COMMIT_MAX_DELAY_MS=options['delay_ms'],
+                    GROUP_COMMIT_MAX_BATCH=options['max_batch'],
+                ):
+                    # Settings are read when the committer is first built
+                    from tickets import group_commit
+                    group_commit._committer = None
+                    self.run_mode(label, options['requests'], options['threads'])
+        finally:
+            Ticket.objects.filter(title__startswith=TITLE_PREFIX).delete()
+
+    def run_mode(self, label, total, threads):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        counter = iter(range(total))
+        start_barrier = threading.Barrier(threads)
+
+        def worker():
+            # Count failed requests (e.g. SQLite "database is locked") instead of raising
+            client = Client(raise_request_exception=False)
+            start_barrier.wait()
+            try:
+                while True:
+                    with lock:
+                        number = next(counter, None)
+                    if number is None:
+                        return
+                    started = time.perf_counter()
+                    response = client.post('/api/tickets/', {
+                        'title': f'{TITLE_PREFIX} {number}',
+                        'description': f'Load test ticket number {number} created by the benchmark',
+                        'category': 'technical',
+                        'priority': 'medium',
+                    }, content_type='application/json')
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+                        if response.status_code != 201:
+                            errors.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+        self.stdout.write(
+            f'{label:<14} {len(latencies) / elapsed:>8.1f} {statistics.median(latencies):>8.1f} '
+            f'{percentile(0.95):>8.1f} {percentile(0.99):>8.1f} {len(errors):>7}'
+        )
@@ -0,0 +1,196 @@
+"""
+In-process metrics registry for the ticket API.
+Collects counters and histograms and renders them in Prometheus text format.
+"""
+import threading
+from bisect import bisect_left
+
+
+# Latency buckets in seconds, roughly following the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for per-request SQL query counts
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    """Render a label set as {name="value",...}, or an empty string when there are none."""
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    """Render a sample value, keeping integers free of a trailing .0."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+class Counter:
+    """Monotonically increasing counter, optionally split by labels."""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(Counter):
+    """Value that can go up and down, optionally split by labels."""
+
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, optionally split by labels."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), running sum, total count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        series = self._series.get(key)
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+                yield f'{self.name}_bucket', labels, cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), total
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), count
+
+
+class Registry:
+    """Holds every metric of the process and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """Return all metrics in Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for sample_name, labels, value in metric.samples():
+                lines.append(f'{sample_name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# HTTP request metrics, recorded by tickets.middleware.MetricsMiddleware
+http_request_duration = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Time spent handling a request, by route.',
+    ['method', 'route', 'status'],
+)
+http_request_db_queries = REGISTRY.histogram(
+    'http_request_db_queries',
+    'Number of SQL queries executed per request, by route.',
+    ['method', 'route'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_duration = REGISTRY.histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in SQL per request, by route.',
+    ['method', 'route'],
+)
+http_slow_requests = REGISTRY.counter(
+    'http_slow_requests_total',
+    'Requests slower than SLOW_REQUEST_THRESHOLD_MS, by route.',
+    ['method', 'route'],
+)
+
+# LLM classification metrics, recorded by tickets.llm_service.LLMClassifier
+llm_request_duration = REGISTRY.histogram(
+    'llm_request_duration_seconds',
+    'Latency of LLM classification calls, by model and outcome.',
+    ['model', 'outcome'],
+)
+llm_requests = REGISTRY.counter(
+    'llm_requests_total',
+    'LLM classification calls, by model and outcome.',
+    ['model', 'outcome'],
+)
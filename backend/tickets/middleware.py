@@ -0,0 +1,197 @@
+"""
+Request instrumentation middleware for the ticket API.
+Records per-route latency, SQL query count and SQL time for every request,
+and compresses large responses.
+"""
+import gzip
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from . import metrics
+from .slow_queries import current_view, recorder
+
+
+logger = logging.getLogger('tickets.performance')
+
+
+class QueryCollector:
+    """
+    Execute wrapper that counts SQL queries and accumulates the time spent in them.
+    Installed on every database connection for the duration of a request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Plans sampled by the slow-query recorder aren't the request's own queries
+        if recorder.is_explaining():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def resolve_route(request):
+    """
+    Return a low-cardinality route label for the request.
+    Uses the URL name (e.g. 'ticket-list') rather than the raw path so ids don't leak into labels.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL query count and SQL time per route.
+    Requests slower than SLOW_REQUEST_THRESHOLD_MS are also logged as a JSON line.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        self.slow_threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 500) / 1000
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        collector = QueryCollector()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        route = resolve_route(request)
+        metrics.http_request_duration.observe(
+            duration, method=request.method, route=route, status=response.status_code
+        )
+        metrics.http_request_db_queries.observe(collector.count, method=request.method, route=route)
+        metrics.http_request_db_duration.observe(collector.duration, method=request.method, route=route)
+
+        if duration >= self.slow_threshold:
+            metrics.http_slow_requests.inc(method=request.method, route=route)
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'db_queries': collector.count,
+                'db_ms': round(collector.duration * 1000, 1),
+            }))
+
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Tag the request's SQL with the view serving it, so slow queries can be traced back.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        current_view.set(f'{match._func_path} ({match.view_name})' if match else request.path)
+
+
+def accepted_encodings(header):
+    """Map each content-coding in an Accept-Encoding header to its q-value."""
+    encodings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least RESPONSE_COMPRESSION_MIN_BYTES with Brotli (when the
+    brotli package is installed) or gzip, whichever the client prefers. Smaller responses
+    are sent as-is: below roughly a kilobyte the CPU time costs more than the bytes saved.
+    """
+
+    # API payloads only: HTML pages carry CSRF tokens, which compression can leak (BREACH)
+    COMPRESSIBLE_TYPES = ('application/json', 'text/plain')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'RESPONSE_COMPRESSION_ENABLED', True)
+        self.min_bytes = getattr(settings, 'RESPONSE_COMPRESSION_MIN_BYTES', 1024)
+        self.gzip_level = getattr(settings, 'RESPONSE_COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'RESPONSE_COMPRESSION_BROTLI_QUALITY', 4)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.enabled or response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(self.COMPRESSIBLE_TYPES):
+            return response
+        if len(response.content) < self.min_bytes:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(response.content, compresslevel=self.gzip_level, mtime=0)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The encoded body is no longer byte-identical to the representation the ETag named
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def choose_encoding(self, header):
+        """Pick 'br' or 'gzip' by the client's q-values, preferring br on ties; None if neither is acceptable."""
+        encodings = accepted_encodings(header)
+        wildcard = encodings.get('*', 0.0)
+        candidates = (['br'] if brotli is not None else []) + ['gzip']
+        scored = [(encodings.get(name, wildcard), name) for name in candidates]
+        quality, name = max(scored, key=lambda item: item[0])
+        return name if quality > 0 else None
@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-19 00:21
+
+from django.db import migrations, models
+
+
+def partition_archive(apps, schema_editor):
+    """
+    On PostgreSQL, rebuild the archive table as RANGE-partitioned by created_at.
+    The primary key must include the partition key, so it becomes (id, created_at).
+    Yearly partitions are created on demand by tickets.archive.ensure_partitions().
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE TABLE tickets_ticket_archive_partitioned '
+        '(LIKE tickets_ticket_archive INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+    )
+    schema_editor.execute('DROP TABLE tickets_ticket_archive')
+    schema_editor.execute('ALTER TABLE tickets_ticket_archive_partitioned RENAME TO tickets_ticket_archive')
+    schema_editor.execute('ALTER TABLE tickets_ticket_archive ADD PRIMARY KEY (id, created_at)')
+    schema_editor.execute(
+        'CREATE INDEX tickets_ticket_archive_created_at_idx ON tickets_ticket_archive (created_at)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTicket',
+            fields=[
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('category', models.CharField(choices=[('billing', 'Billing'), ('technical', 'Technical'), ('account', 'Account'), ('general', 'General')], max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], default='open', max_length=20)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'tickets_ticket_archive',
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(partition_archive, migrations.RunPython.noop),
+    ]
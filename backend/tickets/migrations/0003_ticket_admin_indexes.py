@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 00:24
+
+from django.db import migrations, models
+
+
+def create_title_prefix_index(apps, schema_editor):
+    """
+    On PostgreSQL, index UPPER(title) with text_pattern_ops so the admin's
+    title__istartswith search (UPPER(title) LIKE 'X%') can use an index scan.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX tickets_ticket_title_upper_like '
+        'ON tickets_ticket (UPPER(title::text) text_pattern_ops)'
+    )
+
+
+def drop_title_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS tickets_ticket_title_upper_like')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticket_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.RunPython(create_title_prefix_index, drop_title_prefix_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-19 00:26
+
+from django.db import migrations, models
+
+
+PRIORITY_RANKS = {
+    'critical': 1,
+    'high': 2,
+    'medium': 3,
+    'low': 4,
+}
+
+
+def populate_priority_rank(apps, schema_editor):
+    """Fill priority_rank for existing rows, one UPDATE per priority value."""
+    for model_name in ('Ticket', 'ArchivedTicket'):
+        model = apps.get_model('tickets', model_name)
+        for priority, rank in PRIORITY_RANKS.items():
+            model.objects.filter(priority=priority).update(priority_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_ticket_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedticket',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['priority_rank', 'created_at'], name='ticket_open_queue_idx'),
+        ),
+    ]
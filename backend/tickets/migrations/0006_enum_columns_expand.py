@@ -0,0 +1,158 @@
+# Expand step of the CharField -> EnumField (small integer) migration for
+# category, priority and status. Safe to run while the previous release serves
+# traffic: it only adds nullable shadow columns, backfills existing rows in
+# short batches, and on PostgreSQL keeps them in sync with a trigger, builds the
+# indexes the contract step needs with CREATE INDEX CONCURRENTLY and proves the
+# columns are filled with validated CHECK constraints. 0007_enum_columns_contract
+# then swaps the columns in one quick, catalog-only transaction. Other databases
+# have no trigger, so 0007 first fills in the codes of rows written in between,
+# and rebuilds the tables; there the contract step is not zero-downtime.
+
+from django.db import migrations, models
+from django.db.models import Case, Q, When
+
+
+# Frozen copy of the choices; codes are the 1-based position, as in tickets.fields.EnumField
+ENUM_CHOICES = {
+    'category': ['billing', 'technical', 'account', 'general'],
+    'priority': ['low', 'medium', 'high', 'critical'],
+    'status': ['open', 'in_progress', 'resolved', 'closed'],
+}
+
+TABLES = ['tickets_ticket', 'tickets_ticket_archive']
+
+BATCH_SIZE = 5000
+
+
+def code_case_sql(field):
+    whens = ' '.join(
+        f"WHEN '{value}' THEN {code}" for code, value in enumerate(ENUM_CHOICES[field], start=1)
+    )
+    return f'CASE NEW.{field} {whens} END'
+
+
+def create_sync_triggers(apps, schema_editor):
+    """
+    On PostgreSQL, fill the shadow *_code columns on every INSERT/UPDATE made by
+    the previous release, so no row is missed between backfill and contract.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    assignments = ' '.join(f'NEW.{field}_code := {code_case_sql(field)};' for field in ENUM_CHOICES)
+    schema_editor.execute(
+        'CREATE OR REPLACE FUNCTION tickets_sync_enum_codes() RETURNS trigger AS $$ '
+        f'BEGIN {assignments} RETURN NEW; END $$ LANGUAGE plpgsql'
+    )
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE TRIGGER {table}_sync_enum_codes BEFORE INSERT OR UPDATE ON {table} '
+            'FOR EACH ROW EXECUTE FUNCTION tickets_sync_enum_codes()'
+        )
+
+
+def drop_sync_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_sync_enum_codes ON {table}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS tickets_sync_enum_codes()')
+
+
+def backfill_codes(apps, schema_editor):
+    """
+    Copy string values into the *_code columns, BATCH_SIZE primary keys per UPDATE.
+    The migration is non-atomic, so each batch commits on its own and row locks stay short.
+    """
+    updates = {
+        f'{field}_code': Case(
+            *(When(**{field: value}, then=code) for code, value in enumerate(values, start=1)),
+            output_field=models.PositiveSmallIntegerField(),
+        )
+        for field, values in ENUM_CHOICES.items()
+    }
+    for model_name in ('Ticket', 'ArchivedTicket'):
+        model = apps.get_model('tickets', model_name)
+        manager = model.objects.using(schema_editor.connection.alias)
+        bounds = manager.aggregate(low=models.Min('pk'), high=models.Max('pk'))
+        if bounds['low'] is None:
+            continue
+        for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+            manager.filter(pk__gte=start, pk__lt=start + BATCH_SIZE).update(**updates)
+
+
+def not_null_checks():
+    for table in TABLES:
+        for field in ENUM_CHOICES:
+            yield table, f'{field}_code', f'{table}_{field}_code_not_null'
+
+
+def add_not_null_checks(apps, schema_editor):
+    """
+    On PostgreSQL, add CHECK (... IS NOT NULL) NOT VALID, which doesn't scan, then
+    validate it, which scans without blocking reads or writes. SET NOT NULL in
+    0007 can then rely on the constraint instead of scanning under an exclusive lock.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column, name in not_null_checks():
+        schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({column} IS NOT NULL) NOT VALID')
+        schema_editor.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+
+def drop_not_null_checks(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, _column, name in not_null_checks():
+        schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """AddIndex that uses CREATE INDEX CONCURRENTLY on PostgreSQL (non-atomic migrations only)."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, **self.concurrently(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, **self.concurrently(schema_editor))
+
+    @staticmethod
+    def concurrently(schema_editor):
+        return {'concurrently': True} if schema_editor.connection.vendor == 'postgresql' else {}
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tickets', '0005_ticket_ordering_indexes'),
+    ]
+
+    operations = [
+        *(
+            migrations.AddField(
+                model_name=model_name,
+                name=f'{field}_code',
+                field=models.PositiveSmallIntegerField(null=True),
+            )
+            for model_name in ('ticket', 'archivedticket')
+            for field in ENUM_CHOICES
+        ),
+        migrations.RunPython(create_sync_triggers, drop_sync_triggers),
+        migrations.RunPython(backfill_codes, migrations.RunPython.noop),
+        # Same definitions as ticket_open_queue_idx and ticket_status_order_idx on
+        # the code columns; 0007 renames them into place
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(condition=Q(status_code=1), fields=['priority_rank', 'created_at'], name='ticket_open_queue_code_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['status_code', '-created_at', '-id'], name='ticket_status_code_order_idx'),
+        ),
+        migrations.RunPython(add_not_null_checks, drop_not_null_checks),
+    ]
@@ -0,0 +1,203 @@
+# Contract step of the CharField -> EnumField migration: drop the string columns
+# and promote the backfilled *_code columns in their place. Runs in one
+# transaction; on PostgreSQL it only touches the catalog: 0006 already built the
+# indexes concurrently (they are renamed here) and validated CHECK constraints
+# that let it set NOT NULL without a table scan. Other databases backfill codes
+# the previous release left NULL and rebuild the tables, blocking writes while
+# they do. Apply together with the release that uses EnumField.
+
+from django.db import migrations, models
+import tickets.fields
+
+
+CHOICES = {
+    'category': [('billing', 'Billing'), ('technical', 'Technical'), ('account', 'Account'), ('general', 'General')],
+    'priority': [('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')],
+    'status': [('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')],
+}
+
+MODELS = ('ticket', 'archivedticket')
+
+TABLES = ('tickets_ticket', 'tickets_ticket_archive')
+
+# Built concurrently by 0006 on the code columns: (0006 name, final index)
+INDEXES = [
+    ('ticket_open_queue_code_idx', models.Index(
+        condition=models.Q(('status', 'open')), fields=['priority_rank', 'created_at'], name='ticket_open_queue_idx',
+    )),
+    ('ticket_status_code_order_idx', models.Index(
+        fields=['status', '-created_at', '-id'], name='ticket_status_order_idx',
+    )),
+]
+
+
+def drop_sync_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_sync_enum_codes ON {table}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS tickets_sync_enum_codes()')
+
+
+def backfill_missing_codes(apps, schema_editor):
+    """
+    Without PostgreSQL's sync trigger, rows the previous release wrote after 0006's
+    backfill still have NULL codes; fill them before the columns become NOT NULL.
+    Runs in this migration's transaction, which on SQLite holds the write lock, so
+    no new row can slip in before the columns are rebuilt.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    for model_name in ('Ticket', 'ArchivedTicket'):
+        manager = apps.get_model('tickets', model_name).objects.using(schema_editor.connection.alias)
+        for field, choices in CHOICES.items():
+            manager.filter(**{f'{field}_code__isnull': True}).update(**{
+                f'{field}_code': models.Case(
+                    *(
+                        models.When(**{field: value}, then=models.Value(code))
+                        for code, (value, _label) in enumerate(choices, start=1)
+                    ),
+                    output_field=models.PositiveSmallIntegerField(),
+                ),
+            })
+
+
+def restore_strings(apps, schema_editor):
+    """Reverse only: copy the codes back into the re-added string columns."""
+    for model_name in ('Ticket', 'ArchivedTicket'):
+        model = apps.get_model('tickets', model_name)
+        model.objects.using(schema_editor.connection.alias).update(**{
+            field: models.Case(
+                *(
+                    models.When(**{f'{field}_code': code}, then=models.Value(value))
+                    for code, (value, _label) in enumerate(choices, start=1)
+                ),
+                output_field=models.CharField(),
+            )
+            for field, choices in CHOICES.items()
+        })
+
+
+def rename_indexes(apps, schema_editor):
+    """
+    Move 0006's indexes to their final names. Other databases rebuilt the table
+    while altering the columns and dropped them, so create the indexes instead.
+    """
+    model = apps.get_model('tickets', 'Ticket')
+    for old_name, index in INDEXES:
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(f'ALTER INDEX {old_name} RENAME TO {index.name}')
+        else:
+            schema_editor.add_index(model, index)
+
+
+def unrename_indexes(apps, schema_editor):
+    model = apps.get_model('tickets', 'Ticket')
+    for old_name, index in INDEXES:
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(f'ALTER INDEX {index.name} RENAME TO {old_name}')
+        else:
+            schema_editor.remove_index(model, index)
+
+
+def not_null_checks():
+    for table in TABLES:
+        for field in CHOICES:
+            yield table, field, f'{table}_{field}_code_not_null'
+
+
+def drop_not_null_checks(apps, schema_editor):
+    """The NOT NULL columns make 0006's CHECK constraints redundant."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, _column, name in not_null_checks():
+        schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+
+
+def restore_not_null_checks(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column, name in not_null_checks():
+        schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({column} IS NOT NULL) NOT VALID')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_enum_columns_expand'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sync_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_missing_codes, migrations.RunPython.noop),
+        # Dropping an index is a catalog change; its replacement already exists
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_open_queue_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_status_order_idx',
+        ),
+        # Drop NOT NULL first so a reverse migration can re-add the string columns
+        *(
+            migrations.AlterField(
+                model_name=model_name,
+                name=field,
+                field=models.CharField(
+                    max_length=20,
+                    choices=choices,
+                    null=True,
+                    **({'default': 'open'} if field == 'status' else {})
+                ),
+            )
+            for model_name in MODELS
+            for field, choices in CHOICES.items()
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_strings),
+        # 0006's indexes refer to the *_code names; re-added under the final names below
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.RemoveIndex(model_name='ticket', name=old_name)
+            for old_name, _index in INDEXES
+        ]),
+        *(
+            migrations.RemoveField(model_name=model_name, name=field)
+            for model_name in MODELS
+            for field in CHOICES
+        ),
+        *(
+            migrations.RenameField(model_name=model_name, old_name=f'{field}_code', new_name=field)
+            for model_name in MODELS
+            for field in CHOICES
+        ),
+        # SET NOT NULL, proven by 0006's validated CHECK constraints. The status
+        # default comes in a separate step: going from NULL to NOT NULL with a
+        # default would first UPDATE every NULL row, which means a full scan
+        *(
+            migrations.AlterField(
+                model_name=model_name,
+                name=field,
+                field=tickets.fields.EnumField(choices=choices),
+            )
+            for model_name in MODELS
+            for field, choices in CHOICES.items()
+        ),
+        *(
+            migrations.AlterField(
+                model_name=model_name,
+                name='status',
+                field=tickets.fields.EnumField(choices=CHOICES['status'], default='open'),
+            )
+            for model_name in MODELS
+        ),
+        migrations.RunPython(drop_not_null_checks, restore_not_null_checks),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='ticket', index=index)
+                for _old_name, index in INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(rename_indexes, unrename_indexes),
+            ],
+        ),
+    ]
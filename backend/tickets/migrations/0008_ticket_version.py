@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_enum_columns_contract'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedticket',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
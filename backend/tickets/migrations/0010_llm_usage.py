@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 00:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_ticket_duplicate_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('request_id', models.UUIDField()),
+                ('backend', models.CharField(blank=True, max_length=200)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('outcome', models.CharField(max_length=20)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.FloatField()),
+                ('cache_hit', models.BooleanField(default=False)),
+            ],
+        ),
+    ]
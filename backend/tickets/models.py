@@ -1,8 +1,13 @@
 from django.db import models
+from django.utils import timezone
+
+from .fields import EnumField
 
 # Create your models here.
 
-class Ticket(models.Model):
+class AbstractTicket(models.Model):
+    """Columns shared by live tickets and their archived copies."""
+
     CATEGORY_CHOICES = [
         ('billing', 'Billing'),
         ('technical', 'Technical'),
@@ -17,6 +22,14 @@ class Ticket(models.Model):
         ('critical', 'Critical'),
     ]
     
+    # Severity order for sorting and the work queue: lower rank = more urgent
+    PRIORITY_RANKS = {
+        'critical': 1,
+        'high': 2,
+        'medium': 3,
+        'low': 4,
+    }
+    
     STATUS_CHOICES = [
         ('open', 'Open'),
         ('in_progress', 'In Progress'),
@@ -26,13 +39,94 @@ class Ticket(models.Model):
     
     title = models.CharField(max_length=200)
     description = models.TextField()
-    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
-    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Enum columns store small integer codes; values stay strings (see tickets.fields.EnumField)
+    category = EnumField(choices=CATEGORY_CHOICES)
+    priority = EnumField(choices=PRIORITY_CHOICES)
+    # Derived from priority in save(), so severity ordering can use an index
+    priority_rank = models.PositiveSmallIntegerField(default=0, editable=False)
+    status = EnumField(choices=STATUS_CHOICES, default='open')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Incremented on every write; PATCH with If-Match compares against it
+    version = models.PositiveIntegerField(default=1, editable=False)
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        self.priority_rank = self.PRIORITY_RANKS.get(self.priority, 0)
+        if not self._state.adding:
+            self.version += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'version'}
+            if 'priority' in update_fields:
+                update_fields.add('priority_rank')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
     class Meta:
+        abstract = True
         ordering = ['-created_at']
+
+
+class Ticket(AbstractTicket):
+    """Live support ticket, served by the API."""
+
+    class Meta(AbstractTicket.Meta):
+        indexes = [
+            # Work queue: open tickets, most urgent then oldest first (see tickets.work_queue)
+            models.Index(
+                fields=['priority_rank', 'created_at'],
+                name='ticket_open_queue_idx',
+                condition=models.Q(status='open'),
+            ),
+            # ?ordering=-priority / priority and ?ordering=status keyset pages (see tickets.pagination)
+            models.Index(fields=['priority_rank', '-created_at', '-id'], name='ticket_priority_order_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='ticket_status_order_idx'),
+        ]
+
+
+class ArchivedTicket(AbstractTicket):
+    """
+    Resolved/closed ticket moved out of the live table by the archive_tickets command.
+    Keeps the original id and created_at. On PostgreSQL the table is range-partitioned
+    by created_at (one partition per year, see tickets.archive).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta(AbstractTicket.Meta):
+        db_table = 'tickets_ticket_archive'
+
+
+
+class TicketSignature(models.Model):
+    """MinHash signature of a ticket's description, used for near-duplicate lookups."""
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    # NUM_PERM little-endian uint32 values (see tickets.duplicates)
+    signature = models.BinaryField()
+
+
+class TicketLSHBucket(models.Model):
+    """One LSH band bucket of a ticket signature; tickets sharing a bucket are duplicate candidates."""
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='lsh_buckets')
+    bucket = models.BigIntegerField(db_index=True)
+
+
+class LLMUsage(models.Model):
+    """
+    Append-only ledger of classification attempts, written in batches by tickets.usage.
+    Attempts made for the same classify request share a request_id.
+    """
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    request_id = models.UUIDField()
+    # Backend name from LLM_BACKENDS; empty for cache hits and rejected requests
+    backend = models.CharField(max_length=200, blank=True)
+    model = models.CharField(max_length=100, blank=True)
+    # success, invalid_response, rate_limited, error, rejected or unavailable
+    outcome = models.CharField(max_length=20)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.FloatField()
+    cache_hit = models.BooleanField(default=False)
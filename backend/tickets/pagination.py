@@ -0,0 +1,99 @@
+"""
+Ordering and keyset (cursor) pagination for the ticket list.
+Each ordering ends in unique tie-breakers, so a page boundary is identified by
+the sort-key values of its last row. The next page is then a range condition on
+those keys, which an index on the same columns can serve directly however deep
+the page is, unlike OFFSET.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+from .models import Ticket
+
+
+# ?ordering= value -> ORDER BY columns. Severity uses priority_rank (critical=1),
+# so "-priority" (most severe first) is ascending rank. status is stored as its
+# EnumField code, so it sorts in workflow order (open, in_progress, resolved, closed).
+ORDERINGS = {
+    '-created_at': ('-created_at', '-id'),
+    'created_at': ('created_at', 'id'),
+    '-priority': ('priority_rank', '-created_at', '-id'),
+    'priority': ('-priority_rank', 'created_at', 'id'),
+    'status': ('status', '-created_at', '-id'),
+    '-status': ('-status', 'created_at', 'id'),
+}
+
+DEFAULT_ORDERING = '-created_at'
+
+# Upper bound for ?limit=
+MAX_PAGE_SIZE = 500
+
+
+def resolve_ordering(request):
+    """Return (name, columns) for the request's ?ordering=; raises ValueError if unknown."""
+    name = request.query_params.get('ordering') or DEFAULT_ORDERING
+    if name not in ORDERINGS:
+        raise ValueError(f"Unknown ordering: {name}. Choose from {', '.join(ORDERINGS)}")
+    return name, ORDERINGS[name]
+
+
+def page_size(request):
+    """Return the ?limit= page size, or None when the client did not ask for paging."""
+    value = request.query_params.get('limit')
+    if not value and not request.query_params.get('cursor'):
+        return None
+    try:
+        size = int(value) if value else 50
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if size < 1:
+        raise ValueError('limit must be positive')
+    return min(size, MAX_PAGE_SIZE)
+
+
+def key_columns(columns):
+    return [column.lstrip('-') for column in columns]
+
+
+def encode_cursor(ordering, columns, row):
+    """Build the opaque cursor pointing just after `row` (a model instance or values dict)."""
+    values = []
+    for name in key_columns(columns):
+        value = row[name] if isinstance(row, dict) else getattr(row, name)
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+    payload = json.dumps([ordering, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, ordering, columns):
+    """Return the key values stored in `cursor`; raises ValueError if it is malformed or stale."""
+    try:
+        cursor_ordering, raw_values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_ordering != ordering or len(raw_values) != len(columns):
+        raise ValueError('Cursor does not match the requested ordering')
+    try:
+        return [
+            Ticket._meta.get_field(name).to_python(value)
+            for name, value in zip(key_columns(columns), raw_values)
+        ]
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def after_cursor(columns, values):
+    """
+    Q selecting rows strictly after the cursor position in `columns` order:
+    (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z), with < for descending columns.
+    """
+    condition = Q()
+    equal = Q()
+    for column, value in zip(columns, values):
+        name = column.lstrip('-')
+        lookup = 'lt' if column.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
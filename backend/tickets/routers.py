@@ -0,0 +1,96 @@
+"""
+Read-replica routing for the ticket API.
+GET requests on the list, detail and stats endpoints read from a replica; every
+write goes to the primary. After a client writes, its reads stay on the primary
+for REPLICA_PIN_SECONDS so it always sees its own changes despite replication lag.
+"""
+import contextvars
+import functools
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+# True while serving a request whose reads may go to a replica
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to a random replica when the current request allows it, else to the primary.
+    Reads inside a transaction on the primary stay there so they see its uncommitted writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if replicas and _use_replica.get() and not connections['default'].in_atomic_block:
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+def client_key(request):
+    """Identify the client for read-your-writes pinning (first X-Forwarded-For hop or peer address)."""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    address = forwarded.split(',')[0].strip() if forwarded else request.META.get('REMOTE_ADDR', '')
+    return f'replica-pin:{address}'
+
+
+def is_pinned(request):
+    return cache.get(client_key(request)) is not None
+
+
+def reads_from_replica():
+    """True while the current request's reads may be served by a (possibly lagging) replica."""
+    return bool(getattr(settings, 'DATABASE_REPLICAS', [])) and _use_replica.get()
+
+
+def pin_to_primary(request):
+    cache.set(client_key(request), True, timeout=getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+
+
+@contextmanager
+def replica_reads(request):
+    """
+    Let reads made while handling `request` use a replica, unless it is a write or
+    the client wrote recently. Writes pin the client to the primary.
+    """
+    if not getattr(settings, 'DATABASE_REPLICAS', []):
+        yield
+        return
+    safe = request.method in SAFE_METHODS
+    token = _use_replica.set(safe and not is_pinned(request))
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+    if not safe:
+        pin_to_primary(request)
+
+
+def use_replica_for_reads(view):
+    """Decorator for function views; see replica_reads()."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """ViewSet mixin that routes safe-method reads to replicas; see replica_reads()."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(request):
+            return super().dispatch(request, *args, **kwargs)
@@ -10,8 +10,8 @@ class TicketSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Ticket
-        fields = ['id', 'title', 'description', 'category', 'priority', 'status', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'title', 'description', 'category', 'priority', 'status', 'created_at', 'version']
+        read_only_fields = ['id', 'created_at', 'version']
     
     def validate_title(self, value):
         """Validate that title is not empty and within length limit."""
@@ -0,0 +1,11 @@
+"""
+Signal handlers for the tickets app, connected in TicketsConfig.ready().
+"""
+from .duplicates import index_ticket
+
+
+def index_ticket_description(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the near-duplicate index current when a ticket is created or its description saved."""
+    if not created and update_fields is not None and 'description' not in update_fields:
+        return
+    index_ticket(instance)
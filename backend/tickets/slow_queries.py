@@ -0,0 +1,149 @@
+"""
+Slow-query recorder for the ticket API.
+Captures SQL statements slower than SLOW_QUERY_THRESHOLD_MS, with their normalized
+text and calling view, and samples their query plans with EXPLAIN.
+Entries are kept in a per-process ring buffer that the admin can display.
+"""
+import contextvars
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Name of the view currently being served, set by tickets.middleware.SlowQueryMiddleware
+current_view = contextvars.ContextVar('current_view', default=None)
+
+slow_queries_total = metrics.REGISTRY.counter(
+    'db_slow_queries_total',
+    'SQL statements slower than SLOW_QUERY_THRESHOLD_MS, by database alias.',
+    ['alias'],
+)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)', re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape so repeated executions group together.
+    Literals become ?, IN-lists collapse to IN (...), whitespace is squeezed.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class SlowQueryRecorder:
+    """
+    Execute wrapper installed on every database connection.
+    Statements over the threshold are stored in a bounded deque (oldest entries drop off);
+    a sampled fraction of slow SELECTs is re-run under EXPLAIN to capture the plan.
+    """
+
+    def __init__(self, threshold_ms=100, sample_rate=0.1, buffer_size=200):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.entries = deque(maxlen=buffer_size)
+        self._local = threading.local()
+
+    def is_explaining(self):
+        """True while this thread runs an EXPLAIN for a sampled slow query."""
+        return getattr(self._local, 'explaining', False)
+
+    def __call__(self, execute, sql, params, many, context):
+        # EXPLAIN statements issued by this recorder go through the wrappers too
+        if self.is_explaining():
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold:
+            self.record(sql, params, many, duration, context['connection'])
+        return result
+
+    def record(self, sql, params, many, duration, connection):
+        slow_queries_total.inc(alias=connection.alias)
+        entry = {
+            'recorded_at': timezone.now(),
+            'alias': connection.alias,
+            'vendor': connection.vendor,
+            'view': current_view.get(),
+            'duration_ms': round(duration * 1000, 1),
+            'sql': normalize_sql(sql),
+            'plan': None,
+        }
+        if not many and self._should_explain(sql):
+            entry['plan'] = self.explain(connection, sql, params)
+        self.entries.append(entry)
+        logger.info("Slow query (%.1f ms) in %s: %s", entry['duration_ms'], entry['view'], entry['sql'])
+
+    def _should_explain(self, sql):
+        # Only SELECTs: EXPLAIN ANALYZE executes the statement, which must never repeat a write
+        return sql.lstrip()[:6].upper() == 'SELECT' and random.random() < self.sample_rate
+
+    def explain(self, connection, sql, params):
+        """Return the query plan as text, or None if it could not be obtained."""
+        if connection.vendor == 'postgresql':
+            prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+        elif connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        else:
+            prefix = 'EXPLAIN '
+
+        self._local.explaining = True
+        try:
+            # Savepoint so a failed EXPLAIN can't break an enclosing transaction. In
+            # autocommit there is none to protect, and opening one would make the
+            # tuned SQLite backend queue this read behind every pending writer
+            guard = transaction.atomic(using=connection.alias) if connection.in_atomic_block else nullcontext()
+            with guard:
+                with connection.cursor() as cursor:
+                    cursor.execute(prefix + sql, params)
+                    rows = cursor.fetchall()
+        except Exception as e:
+            logger.warning("EXPLAIN failed for slow query: %s", e)
+            return None
+        finally:
+            self._local.explaining = False
+
+        return '\n'.join(' | '.join(str(col) for col in row) for row in rows)
+
+    def snapshot(self):
+        """Return the buffered entries, newest first."""
+        return list(reversed(self.entries))
+
+    def clear(self):
+        self.entries.clear()
+
+
+recorder = SlowQueryRecorder(
+    threshold_ms=getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100),
+    sample_rate=getattr(settings, 'SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1),
+    buffer_size=getattr(settings, 'SLOW_QUERY_BUFFER_SIZE', 200),
+)
+
+
+def install(sender, connection, **kwargs):
+    """
+    connection_created handler that attaches the recorder to a new connection.
+    Inserted at the front so request-scoped execute_wrapper() blocks, which pop
+    from the end of the list, keep working when a connection opens mid-request.
+    """
+    if recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, recorder)
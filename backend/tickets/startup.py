@@ -0,0 +1,107 @@
+"""
+Cold-start measurement for backend workers.
+Each measurement runs in a fresh interpreter, the way a new worker or container
+starts: it loads the WSGI application and URLconf, serves one request through the
+full middleware stack, and reports how long that took and which heavy optional
+modules ended up imported.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Optional dependencies that should only be imported by the code paths that need them
+LAZY_MODULES = ('openai', 'numpy')
+
+# Runs in the child interpreter: start -> WSGI app -> one request -> report
+_PROBE = r'''
+import io, json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+from config.wsgi import application
+import config.urls
+ready = time.perf_counter()
+path, _, query = sys.argv[1].partition('?')
+status = []
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+    'REMOTE_ADDR': '127.0.0.1', 'HTTP_HOST': 'localhost',
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+body = b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+done = time.perf_counter()
+print(json.dumps({
+    'status': int(status[0].split()[0]),
+    'app_ms': (ready - start) * 1000,
+    'request_ms': (done - ready) * 1000,
+    'modules': sorted(name for name in json.loads(sys.argv[2]) if name in sys.modules),
+}))
+'''
+
+
+def _run(args, extra_env=None):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+    env.update(extra_env or {})
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=False,
+    )
+
+
+def measure_cold_start(path='/api/tickets/', runs=3, env=None):
+    """
+    Start `runs` fresh interpreters that each serve GET `path` once. Returns
+    {'total_ms', 'app_ms', 'request_ms'} medians (total is spawn to response, so it
+    includes interpreter startup), the probe's HTTP status and the LAZY_MODULES it imported.
+    """
+    totals, apps, requests = [], [], []
+    result = None
+    for _run_number in range(runs):
+        started = time.perf_counter()
+        completed = _run(['-c', _PROBE, path, json.dumps(LAZY_MODULES)], env)
+        totals.append((time.perf_counter() - started) * 1000)
+        if completed.returncode != 0:
+            raise RuntimeError(f'Cold-start probe failed:\n{completed.stderr[-2000:]}')
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        apps.append(result['app_ms'])
+        requests.append(result['request_ms'])
+    return {
+        'path': path,
+        'status': result['status'],
+        'total_ms': round(statistics.median(totals), 1),
+        'app_ms': round(statistics.median(apps), 1),
+        'request_ms': round(statistics.median(requests), 1),
+        'imported_lazy_modules': result['modules'],
+    }
+
+
+def import_breakdown(env=None):
+    """
+    Import the WSGI application and URLconf under `python -X importtime`. Returns
+    (total_ms, [(top-level package, self ms), ...] largest first).
+    """
+    completed = _run(['-X', 'importtime', '-c', 'from config.wsgi import application; import config.urls'], env)
+    if completed.returncode != 0:
+        raise RuntimeError(f'Import failed:\n{completed.stderr[-2000:]}')
+    packages = Counter()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _cumulative, name = line.split(':', 1)[1].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us)
+    total = sum(packages.values()) / 1000
+    return round(total, 1), [(name, round(us / 1000, 1)) for name, us in packages.most_common()]
+
+
+def budget_ms():
+    return getattr(settings, 'COLD_START_BUDGET_MS', 2000)
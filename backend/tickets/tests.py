@@ -1,3 +1,778 @@
-from django.test import TestCase
+import pickle
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core import exceptions
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+
+from . import duplicates, list_cache, llm_service, metrics, startup, usage, work_queue
+from .admission import AdmissionController, TokenBucket
+from .db_backends.sqlite_tuned.base import WriterQueue
+from .db_pool import ConnectionPool, PoolTimeout
+from .fake_llm import FakeLLMServer
+from .group_commit import GroupCommitter
+from .llm_service import BackendError, ClassifierBackend, LatencyRouter, LLMClassifier, OpenAICompatibleBackend
+from .middleware import QueryCollector
+from .models import LLMUsage, Ticket
+from .routers import PrimaryReplicaRouter, replica_reads
+from .slow_queries import recorder
+from .work_queue import ClaimContention, claim_next_ticket
+
+
+class ClaimNextTicketConcurrencyTest(TransactionTestCase):
+    """Concurrent agents claiming from the work queue must never receive the same ticket."""
+
+    TICKETS = 60
+    AGENTS = 8
+
+    def setUp(self):
+        priorities = ['low', 'medium', 'high', 'critical']
+        for i in range(self.TICKETS):
+            Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Concurrent claim test',
+                category='technical',
+                priority=priorities[i % len(priorities)],
+            )
+
+    def test_no_double_claims(self):
+        claimed = []
+        claimed_lock = threading.Lock()
+        start = threading.Barrier(self.AGENTS)
+
+        def agent():
+            start.wait()
+            try:
+                while True:
+                    try:
+                        ticket = claim_next_ticket()
+                    except (OperationalError, ClaimContention):
+                        # Lost every race (or SQLite reported the database locked); retry
+                        continue
+                    if ticket is None:
+                        return
+                    with claimed_lock:
+                        claimed.append(ticket.pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=agent) for _ in range(self.AGENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(claimed), len(set(claimed)), 'a ticket was claimed twice')
+        self.assertEqual(len(claimed), self.TICKETS)
+        self.assertFalse(Ticket.objects.filter(status='open').exists())
+
+    def test_claims_most_urgent_oldest_first(self):
+        first = claim_next_ticket()
+        self.assertEqual(first.priority, 'critical')
+        self.assertEqual(first.status, 'in_progress')
+        oldest_critical = Ticket.objects.filter(priority='critical').order_by('created_at').first()
+        self.assertEqual(first.pk, oldest_critical.pk)
+
+    def test_lost_races_are_not_reported_as_empty_queue(self):
+        # Every candidate is taken by "another claimer" between the SELECT and the UPDATE
+        taken = Ticket.objects.filter(status='in_progress')
+        Ticket.objects.update(status='in_progress')
+        with mock.patch.object(work_queue, 'open_queue', return_value=taken.order_by('pk')):
+            with self.assertRaises(ClaimContention):
+                claim_next_ticket(max_attempts=3)
+            response = self.client.post('/api/tickets/next/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        Ticket.objects.update(status='closed')
+        self.assertEqual(self.client.post('/api/tickets/next/').status_code, 204)
+
+
+class StubBackend(ClassifierBackend):
+
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def classify(self, description):
+        self.calls += 1
+        if self.fail:
+            raise BackendError(f'{self.name} is down')
+        return {'suggested_category': 'general', 'suggested_priority': self.name}
+
+
+@override_settings(LLM_USAGE_LEDGER_ENABLED=False)
+class LatencyRouterTest(SimpleTestCase):
+    """The router prefers the backend with the best recent latency and error rate."""
+
+    def test_routes_to_fastest_backend(self):
+        fast, slow = StubBackend('fast'), StubBackend('slow')
+        router = LatencyRouter([slow, fast], explore_rate=0)
+        for _ in range(10):
+            router.record('fast', 0.05, True)
+            router.record('slow', 0.5, True)
+        self.assertEqual(router.classify('text')['suggested_priority'], 'fast')
+        self.assertEqual(slow.calls, 0)
+
+    def test_fails_over_and_penalizes_errors(self):
+        broken, backup = StubBackend('broken', fail=True), StubBackend('backup')
+        router = LatencyRouter([broken, backup], explore_rate=0)
+        self.assertEqual(router.classify('text')['suggested_priority'], 'backup')
+        self.assertEqual(router.ranked()[0].name, 'backup')
+
+    def test_fast_failures_do_not_beat_a_slow_healthy_backend(self):
+        flaky, steady = StubBackend('flaky'), StubBackend('steady')
+        router = LatencyRouter([flaky, steady], explore_rate=0, failure_cost=10.0)
+        for i in range(20):
+            # Errors come back in 10ms; a third of the calls fail
+            router.record('flaky', 0.01 if i % 3 == 0 else 0.2, i % 3 != 0)
+            router.record('steady', 1.5, True)
+        self.assertEqual(router.ranked()[0].name, 'steady')
+        self.assertEqual(router.classify('text')['suggested_priority'], 'steady')
+        self.assertEqual(flaky.calls, 0)
+
+    def test_fake_server_round_trip(self):
+        server = FakeLLMServer(('127.0.0.1', 0))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            port = server.server_address[1]
+            backend = OpenAICompatibleBackend('fake', 'not-needed', base_url=f'http://127.0.0.1:{port}/v1')
+            result = backend.classify('I was charged twice for my subscription')
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(result, {'suggested_category': 'billing', 'suggested_priority': 'high'})
+
+
+@override_settings(LLM_USAGE_LEDGER_ENABLED=True, LLM_RATE_LIMIT_PER_SECOND=0)
+class ClassificationCacheTest(SimpleTestCase):
+    """Cache hits and misses both reach the usage ledger; caching is opt-in."""
+
+    def setUp(self):
+        cache.clear()
+        self.rows = []
+        patcher = mock.patch.object(usage, 'get_writer', return_value=mock.Mock(add=self.rows.append))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = FakeLLMServer(('127.0.0.1', 0))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        backend = OpenAICompatibleBackend(
+            'fake', 'not-needed', base_url=f'http://127.0.0.1:{self.server.server_address[1]}/v1',
+        )
+        self.classifier = LLMClassifier(router=LatencyRouter([backend], explore_rate=0))
+
+    def classify_twice(self):
+        for _ in range(2):
+            self.assertEqual(self.classifier.classify_ticket('I was charged twice')['suggested_category'], 'billing')
+        return [(row.model, row.cache_hit) for row in self.rows]
+
+    def test_off_by_default(self):
+        self.assertEqual(self.classify_twice(), [('fake', False), ('fake', False)])
+
+    @override_settings(LLM_CLASSIFICATION_CACHE_SECONDS=60)
+    def test_records_miss_then_hit(self):
+        self.assertEqual(self.classify_twice(), [('fake', False), ('', True)])
+        self.assertEqual(self.rows[1].outcome, 'success')
+
+
+class AdmissionControlTest(SimpleTestCase):
+    """Requests beyond the rate limit wait in a bounded queue or are rejected at once."""
+
+    def test_token_bucket_reserves_in_order(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0])
+        self.assertEqual(bucket.reserve(max_wait=1), 0.0)
+        self.assertEqual(bucket.reserve(max_wait=1), 0.0)
+        self.assertAlmostEqual(bucket.reserve(max_wait=1), 0.1)
+        self.assertAlmostEqual(bucket.reserve(max_wait=1), 0.2)
+        self.assertIsNone(bucket.reserve(max_wait=0.25))
+        now[0] = 1.0
+        self.assertEqual(bucket.reserve(max_wait=0), 0.0)
+
+    def test_rejects_when_queue_is_full(self):
+        class SlowLimiter:
+            def reserve(self, max_wait):
+                return 1.0
+
+        controller = AdmissionController(SlowLimiter(), max_queue=1, max_wait=5)
+        controller.waiting = 1
+        self.assertFalse(controller.admit())
+
+
+class BatchOperationsTest(TransactionTestCase):
+    """POST /api/batch/ runs operations in order, with reads concurrent and atomic rollback."""
+
+    def post(self, payload):
+        return self.client.post('/api/batch/', payload, content_type='application/json').json()
+
+    def test_create_then_read_in_one_round_trip(self):
+        data = self.post({'operations': [
+            {'id': 'create', 'method': 'POST', 'path': '/api/tickets/', 'body': {
+                'title': 'Batch', 'description': 'Created in a batch', 'category': 'general', 'priority': 'low',
+            }},
+            {'id': 'list', 'method': 'GET', 'path': '/api/tickets/'},
+            {'id': 'stats', 'method': 'GET', 'path': '/api/tickets/stats/'},
+        ]})
+        statuses = {result['id']: result['status'] for result in data['results']}
+        self.assertEqual(statuses, {'create': 201, 'list': 200, 'stats': 200})
+        self.assertEqual(len(data['results'][1]['body']), 1)
+        self.assertEqual(data['results'][2]['body']['total_tickets'], 1)
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        ticket = Ticket.objects.create(
+            title='Atomic', description='Atomic batch', category='general', priority='low',
+        )
+        data = self.post({'atomic': True, 'operations': [
+            {'method': 'PATCH', 'path': f'/api/tickets/{ticket.pk}/', 'body': {'status': 'closed'}},
+            {'method': 'PATCH', 'path': f'/api/tickets/{ticket.pk}/', 'body': {'priority': 'bogus'}},
+            {'method': 'GET', 'path': f'/api/tickets/{ticket.pk}/'},
+        ]})
+        self.assertFalse(data['committed'])
+        self.assertEqual([result['status'] for result in data['results']], [200, 400, 424])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, 'open')
+
+    def test_operation_that_raises_gets_500_without_losing_other_results(self):
+        create = {'method': 'POST', 'path': '/api/tickets/', 'body': {
+            'title': 'Kept', 'description': 'Created before a failing operation',
+            'category': 'general', 'priority': 'low',
+        }}
+        # A non-string description makes the classify view raise
+        broken = {'method': 'POST', 'path': '/api/tickets/classify/', 'body': {'description': 5}}
+        read = {'method': 'GET', 'path': '/api/tickets/'}
+        with self.assertLogs('tickets.batch', 'ERROR'):
+            data = self.post({'operations': [create, broken, read]})
+        self.assertEqual([result['status'] for result in data['results']], [201, 500, 200])
+        self.assertEqual(data['results'][1]['body'], {'detail': 'Internal server error'})
+        self.assertTrue(data['committed'])
+        self.assertTrue(Ticket.objects.filter(title='Kept').exists())
+
+        with self.assertLogs('tickets.batch', 'ERROR'):
+            data = self.post({'atomic': True, 'operations': [create, broken, read]})
+        self.assertEqual([result['status'] for result in data['results']], [201, 500, 424])
+        self.assertFalse(data['committed'])
+        self.assertEqual(Ticket.objects.filter(title='Kept').count(), 1)
+
+    def test_each_operation_is_recorded_in_request_metrics(self):
+        def list_requests():
+            return metrics.http_request_duration.count(method='GET', route='ticket-list', status=200)
+
+        before = list_requests()
+        self.post({'operations': [
+            {'method': 'GET', 'path': '/api/tickets/'},
+            {'method': 'GET', 'path': '/api/tickets/?status=open'},
+        ]})
+        self.assertEqual(list_requests(), before + 2)
+
+    @override_settings(LLM_USAGE_LEDGER_ENABLED=False)
+    def test_classify_operations_pass_admission_control(self):
+        controller = mock.Mock(**{'admit.return_value': False})
+        router = LatencyRouter([StubBackend('high')], explore_rate=0)
+        with mock.patch.object(llm_service, 'get_admission_controller', return_value=controller), \
+                mock.patch.object(llm_service, 'get_router', return_value=router):
+            data = self.post({'operations': [
+                {'method': 'POST', 'path': '/api/tickets/classify/', 'body': {'description': f'Ticket {i}'}}
+                for i in range(3)
+            ]})
+        self.assertEqual(controller.admit.call_count, 3)
+        self.assertTrue(all('note' in result['body'] for result in data['results']))
+
+
+class ColdStartBudgetTest(SimpleTestCase):
+    """A fresh worker must serve its first request within COLD_START_BUDGET_MS."""
+
+    def test_cold_start_within_budget(self):
+        # /metrics needs no database, so the probe doesn't depend on migrations
+        result = startup.measure_cold_start('/metrics', runs=2)
+        self.assertEqual(result['status'], 200)
+        self.assertEqual(result['imported_lazy_modules'], [], 'optional SDKs were imported at startup')
+        self.assertLessEqual(
+            result['total_ms'], startup.budget_ms(),
+            f"cold start took {result['total_ms']} ms; run `manage.py startup_profile` to see where",
+        )
+
+
+class GroupCommitTest(TransactionTestCase):
+    """Concurrent creates share one insert, but each caller gets its own ticket or error."""
+
+    def submit_concurrently(self, tickets):
+        committer = GroupCommitter(max_delay=0.2, max_batch=len(tickets))
+        results = [None] * len(tickets)
+        start = threading.Barrier(len(tickets))
+
+        def submit(index):
+            start.wait()
+            try:
+                results[index] = committer.submit(tickets[index])
+            except Exception as e:
+                results[index] = e
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(tickets))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def ticket(self, number, category='technical'):
+        return Ticket(
+            title=f'Group {number}', description=f'Group commit ticket {number}',
+            category=category, priority='high',
+        )
+
+    def test_each_caller_gets_its_own_ticket(self):
+        results = self.submit_concurrently([self.ticket(i) for i in range(8)])
+        ids = [ticket.pk for ticket in results]
+        self.assertNotIn(None, ids)
+        self.assertEqual(len(set(ids)), 8)
+        self.assertEqual(Ticket.objects.filter(priority_rank=Ticket.PRIORITY_RANKS['high']).count(), 8)
+
+    def test_bad_row_does_not_poison_batch(self):
+        tickets = [self.ticket(i) for i in range(4)] + [self.ticket(99, category='bogus')]
+        results = self.submit_concurrently(tickets)
+        self.assertIsInstance(results[-1], Exception)
+        self.assertTrue(all(isinstance(ticket, Ticket) and ticket.pk for ticket in results[:-1]))
+        self.assertEqual(Ticket.objects.count(), 4)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def cursor(self):
+        if not self.healthy:
+            raise OperationalError('server closed the connection')
+        return self
+
+    def execute(self, sql):
+        pass
+
+    def fetchone(self):
+        return (1,)
+
+    def rollback(self):
+        if not self.healthy:
+            raise OperationalError('server closed the connection')
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """The pool caps open connections, reuses them, and drops idle or dead ones."""
+
+    def setUp(self):
+        self.now = [0.0]
+        self.opened = []
+
+    def connect(self):
+        self.opened.append(FakeConnection())
+        return self.opened[-1]
+
+    def pool(self, **kwargs):
+        return ConnectionPool(name='test', clock=lambda: self.now[0], **kwargs)
+
+    def test_reuses_connections_and_times_out_when_exhausted(self):
+        pool = self.pool(max_size=2, timeout=0)
+        first = pool.acquire(self.connect)
+        second = pool.acquire(self.connect)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect)
+        pool.release(first)
+        self.assertIs(pool.acquire(self.connect), first)
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(pool.stats(), {'size': 2, 'idle': 0, 'in_use': 2, 'max_size': 2})
+        pool.release(second)
+
+    def test_waiter_gets_released_connection(self):
+        pool = self.pool(max_size=1, timeout=5)
+        first = pool.acquire(self.connect)
+        threading.Timer(0.05, pool.release, args=(first,)).start()
+        self.assertIs(pool.acquire(self.connect), first)
+
+    def test_reaps_idle_and_replaces_dead_connections(self):
+        pool = self.pool(max_size=2, max_idle=60)
+        first, second = pool.acquire(self.connect), pool.acquire(self.connect)
+        pool.release(first)
+        self.now[0] = 30
+        pool.release(second)
+        self.now[0] = 70
+        self.assertEqual(pool.reap(), 1)
+        self.assertTrue(first.closed)
+
+        second.healthy = False
+        third = pool.acquire(self.connect)
+        self.assertIsNot(third, second)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+        third.healthy = False
+        pool.release(third)
+        self.assertTrue(third.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class SQLiteWriterQueueTest(TransactionTestCase):
+    """Writers take turns in the queue instead of failing with "database is locked"."""
+
+    def test_waiter_times_out_and_leaves_queue(self):
+        queue = WriterQueue()
+        first, second = object(), object()
+        self.assertTrue(queue.acquire(first, timeout=1))
+        self.assertFalse(queue.acquire(second, timeout=0.05))
+        self.assertEqual(len(queue.waiters), 0)
+        queue.release(first)
+        self.assertTrue(queue.acquire(second, timeout=0))
+
+    @skipUnless(connection.settings_dict['ENGINE'] == 'tickets.db_backends.sqlite_tuned', 'needs SQLITE_TUNED')
+    def test_concurrent_read_then_write_transactions(self):
+        ticket = Ticket.objects.create(
+            title='Counter', description='Writer queue test', category='general', priority='low',
+        )
+        errors = []
+        start = threading.Barrier(8)
+
+        def writer():
+            start.wait()
+            try:
+                for _ in range(10):
+                    with transaction.atomic():
+                        Ticket.objects.get(pk=ticket.pk)
+                        Ticket.objects.filter(pk=ticket.pk).update(version=F('version') + 1)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).version, ticket.version + 80)
+
+
+class SlowQueryExplainTest(TransactionTestCase):
+    """Plans sampled by the slow-query recorder don't count as the request's queries."""
+
+    def test_explain_is_not_collected(self):
+        collector = QueryCollector()
+        with connection.execute_wrapper(collector):
+            Ticket.objects.count()
+            plan = recorder.explain(connection, 'SELECT COUNT(*) FROM tickets_ticket', None)
+        self.assertIsNotNone(plan)
+        self.assertEqual(collector.count, 1)
+
+    @skipUnless(connection.settings_dict['ENGINE'] == 'tickets.db_backends.sqlite_tuned', 'needs SQLITE_TUNED')
+    @override_settings(SQLITE_BUSY_TIMEOUT_MS=100)
+    def test_explain_in_autocommit_does_not_wait_for_writers(self):
+        writer = object()
+        connection.ensure_connection()
+        self.assertTrue(connection.writer_queue.acquire(writer, timeout=1))
+        try:
+            plan = recorder.explain(connection, 'SELECT COUNT(*) FROM tickets_ticket', None)
+        finally:
+            connection.writer_queue.release(writer)
+        self.assertIsNotNone(plan)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Safe reads go to a replica; writes, reads in a transaction and pinned clients use the primary."""
+
+    # 'replica' mirrors the primary. Not a TestCase: on SQLite the mirror's own
+    # connection can't read rows the per-test transaction hasn't committed.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.ticket = Ticket.objects.create(
+            title='Routed', description='Replica routing test', category='general', priority='low',
+        )
+
+    def ticket_queries(self, captured):
+        return [query['sql'] for query in captured.captured_queries if 'tickets_ticket' in query['sql']]
+
+    def request(self, method):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            if method == 'GET':
+                response = self.client.get(f'/api/tickets/{self.ticket.pk}/')
+            else:
+                response = self.client.patch(
+                    f'/api/tickets/{self.ticket.pk}/', {'status': 'in_progress'}, content_type='application/json',
+                )
+        self.assertEqual(response.status_code, 200)
+        return self.ticket_queries(primary), self.ticket_queries(replica)
+
+    def test_safe_reads_use_replica(self):
+        primary, replica = self.request('GET')
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+    def test_write_goes_to_primary_and_pins_reads(self):
+        primary, replica = self.request('PATCH')
+        self.assertTrue(any(sql.startswith('UPDATE') for sql in primary))
+        self.assertEqual(replica, [])
+        # Read-your-writes: the same client reads from the primary for REPLICA_PIN_SECONDS
+        primary, replica = self.request('GET')
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+    def test_reads_in_transaction_stay_on_primary(self):
+        router = PrimaryReplicaRouter()
+        with replica_reads(RequestFactory().get('/api/tickets/')):
+            self.assertEqual(router.db_for_read(Ticket), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Ticket), 'default')
+
+    @override_settings(TICKET_LIST_CACHE_ENABLED=True)
+    def test_list_cache_only_stores_primary_reads(self):
+        list_cache.get_cache().clear()
+        # Replica reads may lag behind the current generation, so they are never cached
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/tickets/')['X-Cache'], 'MISS')
+
+        # A stale list cached under the generation of the write below
+        self.request('PATCH')
+        key = list_cache.cache_key(Request(RequestFactory().get('/api/tickets/')), list_cache.current_generation())
+        list_cache.get_cache().set(key, pickle.dumps([]))
+
+        # The writer is pinned to the primary: it skips the cache and sees its change
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()[0]['status'], 'in_progress')
+
+
+@override_settings(TICKET_LIST_CACHE_ENABLED=True)
+class ListCacheInvalidationTest(TransactionTestCase):
+    """Every committed write invalidates cached ticket lists; uncommitted data is never cached."""
+
+    def setUp(self):
+        list_cache.get_cache().clear()
+        self.ticket = Ticket.objects.create(
+            title='Cached', description='List cache test', category='general', priority='low',
+        )
+
+    def list_tickets(self):
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache']
+
+    def assert_write_invalidates(self, write):
+        self.assertEqual(self.list_tickets(), 'MISS')
+        self.assertEqual(self.list_tickets(), 'HIT')
+        response = write()
+        self.assertLess(response.status_code, 300)
+        self.assertEqual(self.list_tickets(), 'MISS')
+
+    def test_create_invalidates(self):
+        self.assert_write_invalidates(lambda: self.client.post('/api/tickets/', {
+            'title': 'New', 'description': 'Created after caching', 'category': 'billing', 'priority': 'high',
+        }, content_type='application/json'))
+
+    def test_patch_invalidates(self):
+        self.assert_write_invalidates(lambda: self.client.patch(
+            f'/api/tickets/{self.ticket.pk}/', {'status': 'resolved'}, content_type='application/json',
+        ))
+
+    def test_claim_invalidates(self):
+        self.assert_write_invalidates(lambda: self.client.post('/api/tickets/next/'))
+
+    def test_bump_waits_for_commit(self):
+        generation = list_cache.current_generation()
+        with transaction.atomic():
+            Ticket.objects.filter(pk=self.ticket.pk).update(status='closed')
+            list_cache.bump_generation()
+            self.assertEqual(list_cache.current_generation(), generation)
+        self.assertNotEqual(list_cache.current_generation(), generation)
+
+    def test_atomic_batch_read_is_not_cached(self):
+        response = self.client.post('/api/batch/', {'atomic': True, 'operations': [
+            {'method': 'POST', 'path': '/api/tickets/', 'body': {
+                'title': 'Rolled back', 'description': 'Never committed', 'category': 'general', 'priority': 'low',
+            }},
+            {'method': 'GET', 'path': '/api/tickets/'},
+            {'method': 'GET', 'path': '/api/tickets/999999/'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.json()['results'][1]['status'], 200)
+        self.assertEqual(self.list_tickets(), 'MISS')
+        self.assertNotContains(self.client.get('/api/tickets/'), 'Rolled back')
+
+
+class EnumFieldTest(SimpleTestCase):
+
+    def test_unknown_value_is_a_validation_error(self):
+        with self.assertRaises(exceptions.ValidationError):
+            Ticket.objects.filter(status='bogus')
+
+    def test_archive_rejects_unknown_status(self):
+        with self.assertRaisesMessage(CommandError, "invalid choice: 'bogus'"):
+            call_command('archive_tickets', '--status', 'bogus', '--dry-run')
+
+
+class ConditionalUpdateTest(TransactionTestCase):
+    """PATCH with If-Match only writes if the ticket is still at the given version."""
+
+    def setUp(self):
+        self.ticket = Ticket.objects.create(
+            title='Versioned', description='Conditional update', category='general', priority='low',
+        )
+        self.url = f'/api/tickets/{self.ticket.pk}/'
+
+    def patch(self, body, if_match=None):
+        headers = {} if if_match is None else {'If-Match': if_match}
+        return self.client.patch(self.url, body, content_type='application/json', headers=headers)
+
+    def test_matching_version_succeeds_and_increments_version(self):
+        version = self.client.get(self.url)['ETag']
+        response = self.patch({'status': 'in_progress'}, if_match=version)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], self.ticket.version + 1)
+        self.assertEqual(response['ETag'], f'"{self.ticket.version + 1}"')
+
+    def test_stale_version_is_rejected(self):
+        stale = f'"{self.ticket.version}"'
+        self.assertEqual(self.patch({'priority': 'high'}).status_code, 200)
+        response = self.patch({'status': 'closed'}, if_match=stale)
+        self.assertEqual(response.status_code, 412)
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.status, self.ticket.priority), ('open', 'high'))
+
+    def test_wildcard_matches_any_version(self):
+        self.patch({'priority': 'high'})
+        response = self.patch({'status': 'closed'}, if_match='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], self.ticket.version + 2)
+
+    def test_put_is_conditional_too(self):
+        stale = f'"{self.ticket.version}"'
+        self.assertEqual(self.patch({'priority': 'high'}).status_code, 200)
+        body = {'title': 'Replaced', 'description': 'Full update', 'category': 'billing', 'priority': 'low'}
+        response = self.client.put(self.url, body, content_type='application/json', headers={'If-Match': stale})
+        self.assertEqual(response.status_code, 412)
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.title, self.ticket.priority), ('Versioned', 'high'))
+
+        response = self.client.put(
+            self.url, body, content_type='application/json', headers={'If-Match': f'"{self.ticket.version}"'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], self.ticket.version + 1)
+        self.assertEqual(response.json()['title'], 'Replaced')
+
+    def test_malformed_if_match_is_a_bad_request(self):
+        response = self.patch({'status': 'closed'}, if_match='"not-a-version"')
+        self.assertEqual(response.status_code, 400)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'open')
+
+
+@override_settings(DUPLICATE_DETECTION_ENABLED=True, DUPLICATE_SIMILARITY_THRESHOLD=0.5)
+class DuplicateDetectionTest(TransactionTestCase):
+    """Near-identical descriptions are found through shared LSH buckets."""
+
+    DESCRIPTION = (
+        'After the latest update the mobile app crashes on launch every time I open it '
+        'on my phone, and reinstalling the app did not fix the crash'
+    )
+
+    def create(self, description, title='Ticket'):
+        return self.client.post('/api/tickets/', {
+            'title': title, 'description': description, 'category': 'technical', 'priority': 'high',
+        }, content_type='application/json')
+
+    def test_only_tickets_sharing_a_bucket_are_candidates(self):
+        original = self.create(self.DESCRIPTION).json()['id']
+        unrelated = self.create('Please send me a copy of last month invoice for our accounting team').json()['id']
+
+        # Even with threshold 0 the unrelated ticket is never compared: it shares no bucket
+        matches = duplicates.find_duplicates(self.DESCRIPTION.replace('every time', 'each time'), threshold=0)
+        self.assertEqual([ticket_id for ticket_id, _score in matches], [original])
+        self.assertGreater(matches[0][1], 0.5)
+        self.assertNotIn(unrelated, [ticket_id for ticket_id, _score in matches])
+
+    def test_create_lists_possible_duplicates(self):
+        original = self.create(self.DESCRIPTION, title='App crashes').json()
+        self.assertEqual(original['possible_duplicates'], [])
+
+        data = self.create(self.DESCRIPTION + ' either').json()
+        self.assertEqual([(match['id'], match['title']) for match in data['possible_duplicates']],
+                         [(original['id'], 'App crashes')])
+
+        response = self.client.get(f"/api/tickets/{data['id']}/duplicates/", {'limit': 0})
+        self.assertEqual([ticket['id'] for ticket in response.json()], [original['id']])
+
+    def test_threshold_outside_unit_interval_is_rejected(self):
+        ticket = self.create(self.DESCRIPTION).json()
+        for threshold in ('-0.1', '1.5'):
+            response = self.client.get(f"/api/tickets/{ticket['id']}/duplicates/", {'threshold': threshold})
+            self.assertEqual(response.status_code, 400)
+
+
+class UsageSummaryTest(TransactionTestCase):
+    """The LLM usage summary is aggregated in the database, per model and per interval."""
+
+    NOW = datetime(2024, 3, 1, 12, 30, tzinfo=dt_timezone.utc)
+
+    def row(self, minutes_ago, request_id, backend='primary', model='gpt-4', outcome='success',
+            tokens=(0, 0), latency_ms=100.0, cache_hit=False):
+        return LLMUsage(
+            created_at=self.NOW - timedelta(minutes=minutes_ago), request_id=request_id,
+            backend=backend, model=model, outcome=outcome, prompt_tokens=tokens[0],
+            completion_tokens=tokens[1], latency_ms=latency_ms, cache_hit=cache_hit,
+        )
+
+    def setUp(self):
+        first, second, third, cached = (uuid.uuid4() for _ in range(4))
+        LLMUsage.objects.bulk_create([
+            # A request that failed over to a second backend
+            self.row(100, first, outcome='error', tokens=(50, 0), latency_ms=900.0),
+            self.row(100, first, backend='backup', model='llama', tokens=(40, 10), latency_ms=300.0),
+            self.row(20, second, tokens=(60, 20), latency_ms=200.0),
+            self.row(10, third, tokens=(60, 20), latency_ms=400.0),
+            self.row(5, cached, backend='', model='', cache_hit=True, latency_ms=1.0),
+            # Outside the window
+            self.row(60 * 30, uuid.uuid4(), tokens=(1000, 1000)),
+        ])
+
+    def test_summary(self):
+        report = usage.summarize(window=timedelta(hours=2), bucket=timedelta(hours=1), now=self.NOW)
+        self.assertEqual(report['since'], '2024-03-01T10:00:00+00:00')
+        total = report['total']
+        self.assertEqual(
+            {key: total[key] for key in ('requests', 'llm_calls', 'cache_hits', 'failure_rate', 'prompt_tokens')},
+            {'requests': 4, 'llm_calls': 4, 'cache_hits': 1, 'failure_rate': 0.25, 'prompt_tokens': 210},
+        )
+        self.assertEqual(total['tokens_per_ticket'], round(260 / 3, 1))
+        self.assertEqual(total['latency_p50_ms'], 400.0)
+        self.assertEqual(sorted(report['models']), ['gpt-4', 'llama'])
+        self.assertEqual(report['models']['gpt-4']['failure_rate'], round(1 / 3, 4))
+        self.assertEqual(report['models']['llama']['tokens_per_ticket'], 50.0)
+        self.assertEqual(
+            [(bucket['start'], bucket['requests'], bucket['llm_calls']) for bucket in report['buckets']],
+            [('2024-03-01T10:00:00+00:00', 1, 2), ('2024-03-01T12:00:00+00:00', 3, 2)],
+        )
+
+    def test_latency_percentiles_use_a_bounded_sample(self):
+        with mock.patch.object(usage, 'LATENCY_SAMPLE_SIZE', 2):
+            with CaptureQueriesContext(connection) as queries:
+                report = usage.summarize(window=timedelta(hours=2), bucket=timedelta(minutes=30), now=self.NOW)
+        self.assertEqual(report['total']['llm_calls'], 4)
+        self.assertIn('LIMIT 2', queries.captured_queries[-1]['sql'])
+        self.assertIsNotNone(report['total']['latency_p95_ms'])
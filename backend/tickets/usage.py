@@ -0,0 +1,251 @@
+"""
+LLM usage ledger.
+Every classification attempt (tokens, latency, outcome, cache hit) is queued in
+memory and appended to the LLMUsage table by a background thread in batches of
+up to LLM_USAGE_BATCH_SIZE rows every LLM_USAGE_FLUSH_SECONDS, so the request
+path never waits on a ledger INSERT. Rows still queued when a process is killed
+are lost; the ledger is for tuning, not billing reconciliation.
+"""
+import atexit
+import contextvars
+import logging
+import threading
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, Mod, Trunc
+from django.utils import timezone
+
+from . import metrics
+from .models import LLMUsage
+
+
+logger = logging.getLogger(__name__)
+
+# Groups the attempts of one classify request; set by LLMClassifier.classify_ticket
+current_request_id = contextvars.ContextVar('llm_request_id', default=None)
+
+usage_dropped = metrics.REGISTRY.counter(
+    'llm_usage_rows_dropped_total',
+    'LLM usage ledger rows discarded because the queue was full or a flush failed.',
+)
+
+# Outcomes that mean the backend was called but gave no usable answer
+FAILED_OUTCOMES = ('invalid_response', 'rate_limited', 'error')
+
+# Rows that reached a backend (cache hits and rejected requests have none)
+CALLS = ~Q(backend='')
+
+# Latency percentiles are computed from at most this many calls; longer windows
+# are sampled evenly by primary key
+LATENCY_SAMPLE_SIZE = 10000
+
+# Summary buckets are built from rows grouped by the coarsest of these units that
+# divides the bucket length
+TRUNCATE_UNITS = (('day', timedelta(days=1)), ('hour', timedelta(hours=1)), ('minute', timedelta(minutes=1)))
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def is_enabled():
+    return getattr(settings, 'LLM_USAGE_LEDGER_ENABLED', True)
+
+
+class UsageWriter:
+    """Bounded in-memory queue drained into LLMUsage by one daemon thread."""
+
+    def __init__(self, batch_size=200, flush_interval=2.0, max_queue=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = deque()
+        self.max_queue = max_queue
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def add(self, row):
+        with self.lock:
+            if len(self.queue) >= self.max_queue:
+                usage_dropped.inc()
+                return
+            self.queue.append(row)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='llm-usage-writer', daemon=True)
+                self.thread.start()
+            full = len(self.queue) >= self.batch_size
+        if full:
+            self.wakeup.set()
+
+    def take_batch(self):
+        with self.lock:
+            return [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written."""
+        written = 0
+        while True:
+            batch = self.take_batch()
+            if not batch:
+                return written
+            try:
+                LLMUsage.objects.bulk_create(batch)
+                written += len(batch)
+            except Exception as e:
+                usage_dropped.inc(len(batch))
+                logger.error("LLM usage ledger flush failed, %d rows dropped: %s", len(batch), e)
+                return written
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # The writer thread owns its connection; don't keep it open between flushes
+                connection.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = UsageWriter(
+                    batch_size=getattr(settings, 'LLM_USAGE_BATCH_SIZE', 200),
+                    flush_interval=getattr(settings, 'LLM_USAGE_FLUSH_SECONDS', 2.0),
+                )
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def new_request():
+    """Start a classify request; later record() calls in this context share its request_id."""
+    return current_request_id.set(uuid.uuid4())
+
+
+def record(outcome, latency, backend='', model='', prompt_tokens=0, completion_tokens=0, cache_hit=False):
+    """Queue one ledger row. `latency` is in seconds."""
+    if not is_enabled():
+        return
+    get_writer().add(LLMUsage(
+        created_at=timezone.now(),
+        request_id=current_request_id.get() or uuid.uuid4(),
+        backend=backend,
+        model=model,
+        outcome=outcome,
+        prompt_tokens=prompt_tokens or 0,
+        completion_tokens=completion_tokens or 0,
+        latency_ms=round(latency * 1000, 3),
+        cache_hit=cache_hit,
+    ))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list, or None if it is empty."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def counts():
+    """Aggregates behind one summary; computed by the database, never row by row."""
+    return {
+        'requests': Count('request_id', distinct=True),
+        'ticket_requests': Count('request_id', distinct=True, filter=CALLS),
+        'llm_calls': Count('id', filter=CALLS),
+        'cache_hits': Count('id', filter=Q(cache_hit=True)),
+        'rejected': Count('id', filter=Q(outcome='rejected')),
+        'failed': Count('id', filter=CALLS & Q(outcome__in=FAILED_OUTCOMES)),
+        'prompt_tokens': Coalesce(Sum('prompt_tokens', filter=CALLS), 0),
+        'completion_tokens': Coalesce(Sum('completion_tokens', filter=CALLS), 0),
+    }
+
+
+def summarize_counts(totals, latencies):
+    """Build one summary dict from counts() results and a sample of call latencies."""
+    latencies = sorted(latencies)
+    calls = totals['llm_calls']
+    tokens = totals['prompt_tokens'] + totals['completion_tokens']
+    p50, p95 = percentile(latencies, 0.5), percentile(latencies, 0.95)
+    return {
+        'requests': totals['requests'],
+        'llm_calls': calls,
+        'cache_hits': totals['cache_hits'],
+        'rejected': totals['rejected'],
+        'failure_rate': round(totals['failed'] / calls, 4) if calls else None,
+        'latency_p50_ms': round(p50, 1) if p50 is not None else None,
+        'latency_p95_ms': round(p95, 1) if p95 is not None else None,
+        'prompt_tokens': totals['prompt_tokens'],
+        'completion_tokens': totals['completion_tokens'],
+        # Averaged over requests that reached a backend, including failed-over attempts
+        'tokens_per_ticket': round(tokens / totals['ticket_requests'], 1) if totals['ticket_requests'] else None,
+    }
+
+
+def latency_sample(queryset, calls):
+    """(created_at, model, latency_ms) for about LATENCY_SAMPLE_SIZE of the `calls` calls in `queryset`."""
+    step = -(-calls // LATENCY_SAMPLE_SIZE)
+    queryset = queryset.filter(CALLS)
+    if step > 1:
+        queryset = queryset.alias(sample_slot=Mod('id', step)).filter(sample_slot=0)
+    return list(queryset.order_by().values_list('created_at', 'model', 'latency_ms')[:LATENCY_SAMPLE_SIZE])
+
+
+def summarize(window=timedelta(hours=24), bucket=timedelta(hours=1), now=None):
+    """
+    Summarize the ledger over the last `window`: overall, per model, and per `bucket`-long
+    interval (oldest first), so changes in prompts or models show up over time.
+    Counts and token sums are aggregated in the database, grouped by model and by
+    truncated timestamp; latency percentiles come from a sample of at most
+    LATENCY_SAMPLE_SIZE calls. Buckets are whole minutes, and the window starts
+    on a bucket boundary of the truncation unit, so it may begin slightly earlier.
+    """
+    now = now or timezone.now()
+    bucket = timedelta(minutes=max(1, round(bucket / timedelta(minutes=1))))
+    kind, unit = next((kind, unit) for kind, unit in TRUNCATE_UNITS if not bucket % unit)
+    since = now - window
+    since -= (since - EPOCH) % unit
+    rows = LLMUsage.objects.filter(created_at__gte=since).order_by()
+
+    total = rows.aggregate(**counts())
+    by_model = {
+        group.pop('model'): group
+        for group in rows.filter(CALLS).values('model').annotate(**counts())
+    }
+    by_bucket = {}
+    for group in rows.values(interval=Trunc('created_at', kind, tzinfo=dt_timezone.utc)).annotate(**counts()):
+        # Each truncated group lies within one bucket; a request spanning two groups
+        # of the same bucket is counted once per group
+        index = int((group.pop('interval') - since) / bucket)
+        bucket_totals = by_bucket.setdefault(index, dict.fromkeys(group, 0))
+        for key, value in group.items():
+            bucket_totals[key] += value
+
+    model_latencies = defaultdict(list)
+    bucket_latencies = defaultdict(list)
+    sample = latency_sample(rows, total['llm_calls'])
+    for created_at, model, latency in sample:
+        model_latencies[model].append(latency)
+        bucket_latencies[int((created_at - since) / bucket)].append(latency)
+
+    return {
+        'since': since.isoformat(),
+        'until': now.isoformat(),
+        'total': summarize_counts(total, [latency for _created_at, _model, latency in sample]),
+        'models': {
+            model: summarize_counts(totals, model_latencies[model]) for model, totals in sorted(by_model.items())
+        },
+        'buckets': [
+            {'start': (since + index * bucket).isoformat(), **summarize_counts(by_bucket[index], bucket_latencies[index])}
+            for index in sorted(by_bucket)
+        ],
+    }
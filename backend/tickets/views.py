@@ -1,17 +1,103 @@
+from collections import Counter
+from datetime import timedelta
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
-from django.db.models import Q, Count, Min
+from rest_framework.decorators import action, api_view
+from rest_framework.generics import get_object_or_404
+from django.conf import settings
+from django.db.models import F, Q, Count, Min
+from django.http import Http404, HttpResponse
 from django.utils import timezone
-from .models import Ticket
+from . import batch, list_cache, metrics, pagination, usage
+# Aliased so the module isn't confused with the TicketViewSet.duplicates action
+from . import duplicates as duplicate_index
+from .group_commit import create_ticket
+from .models import ArchivedTicket, Ticket
 from .serializers import TicketSerializer
 from .llm_service import LLMClassifier
+from .routers import ReplicaReadMixin, use_replica_for_reads
+from .work_queue import ClaimContention, claim_next_ticket
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+# Fields that can be requested with ?facets=, and the values counted for each
+FACET_CHOICES = {
+    'category': Ticket.CATEGORY_CHOICES,
+    'priority': Ticket.PRIORITY_CHOICES,
+    'status': Ticket.STATUS_CHOICES,
+}
+
+
+def wants_archived(request):
+    """Return True if the request asked to include archived tickets (?include_archived=true)."""
+    return request.query_params.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
+def requested_facets(request):
+    """
+    Parse ?facets= into a list of facet field names.
+    Accepts a comma-separated subset of FACET_CHOICES, or true/all for every facet.
+    Raises ValueError for unknown names.
+    """
+    value = request.query_params.get('facets', '').strip().lower()
+    if not value:
+        return []
+    if value in ('1', 'true', 'all'):
+        return list(FACET_CHOICES)
+    facets = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in facets if name not in FACET_CHOICES]
+    if unknown:
+        raise ValueError(f"Unknown facet(s): {', '.join(unknown)}")
+    return facets
+
+
+def facet_counts(sources, facets):
+    """
+    Count tickets per value of each facet field with one conditional-aggregation query
+    per queryset, so the counts share the list query's WHERE clause and indexes.
+    """
+    aggregates = {}
+    keys = {}
+    for field in facets:
+        for value, _label in FACET_CHOICES[field]:
+            alias = f'facet_{len(aggregates)}'
+            aggregates[alias] = Count('id', filter=Q(**{field: value}))
+            keys[alias] = (field, value)
+
+    counts = {field: {value: 0 for value, _label in FACET_CHOICES[field]} for field in facets}
+    for queryset in sources:
+        for alias, count in queryset.order_by().aggregate(**aggregates).items():
+            field, value = keys[alias]
+            counts[field][value] += count
+    return counts
+
+
+def parse_if_match(request):
+    """
+    Return the ticket version required by the If-Match header, or None when the
+    header is absent or "*". Raises ValueError for a value that is not a version ETag.
+    """
+    header = request.headers.get('If-Match', '').strip()
+    if not header or header == '*':
+        return None
+    tag = header.split(',')[0].strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    return int(tag.strip('"'))
+
+
+def with_etag(response):
+    """Expose the ticket version as the response's ETag, for use in If-Match."""
+    if isinstance(response.data, dict) and 'version' in response.data:
+        response['ETag'] = f'"{response.data["version"]}"'
+    return response
+
+
+class TicketViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for Ticket CRUD operations.
-    Provides list, create, and partial_update actions with filtering and search.
+    Provides list, create, update and partial_update actions with filtering and search.
+    Archived tickets are only included in list and retrieve with ?include_archived=true.
+    GET requests read from a replica when DATABASE_REPLICA_URLS is configured.
     """
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
@@ -21,23 +107,25 @@ class TicketViewSet(viewsets.ModelViewSet):
         Override get_queryset to handle query parameters for filtering and search.
         Supports: category, priority, status (exact filters) and search (title/description).
         """
-        queryset = super().get_queryset()
-        
+        return self.filter_tickets(super().get_queryset())
+    
+    def filter_tickets(self, queryset):
+        """
+        Apply the request's filter and search parameters to a Ticket or ArchivedTicket queryset.
+        """
         # Get query parameters
         category = self.request.query_params.get('category', None)
         priority = self.request.query_params.get('priority', None)
         status_filter = self.request.query_params.get('status', None)
         search = self.request.query_params.get('search', None)
         
-        # Apply exact filters
-        if category:
-            queryset = queryset.filter(category=category)
-        
-        if priority:
-            queryset = queryset.filter(priority=priority)
-        
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+        # Apply exact filters; a value outside the choices matches nothing
+        for field, value in (('category', category), ('priority', priority), ('status', status_filter)):
+            if not value:
+                continue
+            if value not in dict(FACET_CHOICES[field]):
+                return queryset.none()
+            queryset = queryset.filter(**{field: value})
         
         # Apply search filter using Q objects for title and description
         if search:
@@ -49,49 +137,254 @@ class TicketViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         """
-        List all tickets ordered by newest first.
+        List tickets, newest first unless ?ordering= is given.
         Applies filters from query parameters via get_queryset().
+        
+        - ?ordering=: -created_at (default), created_at, -priority (critical first),
+          priority, status or -status. Sorting happens in the database.
+        - ?limit= / ?cursor=: keyset paging; the response carries next_cursor.
+        - ?facets=: adds per-category/priority/status counts for the same filters and search.
+        
+        Paged or faceted responses are {"results": [...], ...}; otherwise a plain list.
+        Responses are served from the list cache when TICKET_LIST_CACHE_ENABLED is set.
         """
-        queryset = self.get_queryset().order_by('-created_at')
+        cache_key, cached = list_cache.lookup(request)
+        if cached is not None:
+            return Response(cached, headers={'X-Cache': 'HIT'})
+        
+        try:
+            facets = requested_facets(request)
+            ordering, columns = pagination.resolve_ordering(request)
+            limit = pagination.page_size(request)
+            cursor = request.query_params.get('cursor')
+            position = pagination.decode_cursor(cursor, ordering, columns) if cursor else None
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = self.get_queryset()
+        sources = [queryset]
+        if wants_archived(request):
+            sources.append(self.filter_tickets(ArchivedTicket.objects.all()))
+        
+        pages = [
+            source.filter(pagination.after_cursor(columns, position)) if position else source
+            for source in sources
+        ]
+        if len(pages) == 1:
+            queryset = pages[0].order_by(*columns)
+        else:
+            # Single UNION ALL query; the serializer reads the rows as dicts
+            fields = dict.fromkeys([
+                *self.get_serializer_class().Meta.fields, *pagination.key_columns(columns)
+            ])
+            queryset = (
+                pages[0].order_by().values(*fields)
+                .union(*(page.order_by().values(*fields) for page in pages[1:]), all=True)
+                .order_by(*columns)
+            )
+        
+        next_cursor = None
+        if limit:
+            rows = list(queryset[:limit + 1])
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = pagination.encode_cursor(ordering, columns, rows[-1])
+            queryset = rows
+        
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        data = serializer.data
+        if limit or facets:
+            data = {'results': data}
+            if limit:
+                data['next_cursor'] = next_cursor
+            if facets:
+                data['facets'] = facet_counts(sources, facets)
+        list_cache.store(cache_key, data)
+        return Response(data, headers={'X-Cache': 'MISS'} if cache_key else None)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a single ticket, falling back to the archive with ?include_archived=true.
+        """
+        try:
+            return with_etag(super().retrieve(request, *args, **kwargs))
+        except Http404:
+            if not wants_archived(request):
+                raise
+        instance = get_object_or_404(ArchivedTicket, pk=kwargs[self.lookup_field])
+        serializer = self.get_serializer(instance)
+        return with_etag(Response(serializer.data))
     
     def create(self, request, *args, **kwargs):
         """
         Create a new ticket.
-        Returns 201 on success.
+        Returns 201 on success. When duplicate detection is enabled the response also
+        lists possible_duplicates: existing tickets with a near-identical description.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        data = serializer.data
+        if getattr(settings, 'DUPLICATE_DETECTION_ENABLED', True):
+            matches = duplicate_index.find_duplicates(
+                serializer.instance.description, exclude_id=serializer.instance.pk, limit=5
+            )
+            titles = dict(Ticket.objects.filter(pk__in=[pk for pk, _ in matches]).values_list('pk', 'title'))
+            data = {
+                **data,
+                'possible_duplicates': [
+                    {'id': pk, 'title': titles[pk], 'similarity': score}
+                    for pk, score in matches if pk in titles
+                ],
+            }
+        return with_etag(Response(data, status=status.HTTP_201_CREATED, headers=headers))
+
+    def perform_create(self, serializer):
+        """Insert the ticket, coalesced with concurrent creates when GROUP_COMMIT_ENABLED is on."""
+        serializer.instance = create_ticket(**serializer.validated_data)
     
-    def partial_update(self, request, *args, **kwargs):
+    def update(self, request, *args, **kwargs):
         """
-        Partially update a ticket (PATCH request).
+        Update a ticket (PUT, or PATCH via partial_update with partial=True).
+        Runs a single UPDATE that writes only the fields sent, without locking or
+        loading the row first; PUT must send every required field. With
+        If-Match: "<version>" (the ETag / version of the ticket as last read) the
+        UPDATE also requires that version, and 412 is returned if someone else
+        changed the ticket in the meantime. An If-Match that is not a version ETag
+        is a client error (400), not a failed precondition.
         """
-        instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=True)
+        serializer = self.get_serializer(data=request.data, partial=kwargs.pop('partial', False))
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        try:
+            expected_version = parse_if_match(request)
+        except ValueError:
+            return Response(
+                {'error': 'If-Match must be a ticket version ETag'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        target = Ticket.objects.filter(pk=pk)
+        if expected_version is not None:
+            target = target.filter(version=expected_version)
+        
+        changes = dict(serializer.validated_data)
+        if changes:
+            if 'priority' in changes:
+                changes['priority_rank'] = Ticket.PRIORITY_RANKS[changes['priority']]
+            updated = target.update(**changes, version=F('version') + 1)
+            if updated:
+                # update() sends no signals, so invalidate cached lists here
+                list_cache.bump_generation()
+        else:
+            updated = target.exists()
+        
+        if not updated:
+            if Ticket.objects.filter(pk=pk).exists():
+                return Response(
+                    {'error': 'Ticket was modified by another request; reload it and retry'},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+            raise Http404
+        
+        instance = Ticket.objects.get(pk=pk)
+        if 'description' in changes and getattr(settings, 'DUPLICATE_DETECTION_ENABLED', True):
+            duplicate_index.index_ticket(instance)
+        return with_etag(Response(self.get_serializer(instance).data))
+    
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        """
+        List likely duplicates of a ticket (GET /api/tickets/{id}/duplicates/), most similar first.
+        Each entry is a ticket plus its estimated description similarity (0-1).
+        Optional ?threshold= between 0 and 1 (default DUPLICATE_SIMILARITY_THRESHOLD) and
+        ?limit= (default 10, clamped to 1-100).
+        """
+        instance = self.get_object()
+        try:
+            threshold = float(request.query_params.get('threshold', settings.DUPLICATE_SIMILARITY_THRESHOLD))
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            return Response(
+                {'error': 'threshold must be a number and limit an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= threshold <= 1:
+            return Response(
+                {'error': 'threshold must be between 0 and 1'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        matches = duplicate_index.find_duplicates(
+            instance.description, exclude_id=instance.pk, threshold=threshold, limit=limit
+        )
+        tickets = Ticket.objects.in_bulk([pk for pk, _ in matches])
+        return Response([
+            {**self.get_serializer(tickets[pk]).data, 'similarity': score}
+            for pk, score in matches if pk in tickets
+        ])
+    
+    @action(detail=False, methods=['post'], url_path='next')
+    def claim_next(self, request):
+        """
+        Claim the most urgent, oldest open ticket (POST /api/tickets/next/).
+        Moves it to in_progress and returns it, or 204 when no open ticket is available.
+        Answers 503 with Retry-After when open tickets exist but concurrent claimers
+        kept taking them first.
+        """
+        try:
+            ticket = claim_next_ticket()
+        except ClaimContention as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+        if ticket is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        serializer = self.get_serializer(ticket)
         return Response(serializer.data)
 
 
+def breakdown(sources, field):
+    """Count tickets grouped by `field`, summed over every queryset in `sources`."""
+    counts = Counter()
+    for queryset in sources:
+        counts.update(dict(
+            queryset.values(field)
+            .annotate(count=Count('id'))
+            .values_list(field, 'count')
+        ))
+    return dict(counts)
+
+
+@use_replica_for_reads
 @api_view(['GET'])
 def ticket_stats(request):
     """
     Return aggregated ticket statistics.
     Includes total count, open count, average per day, and breakdowns by priority and category.
+    Covers live tickets only unless ?include_archived=true is passed.
     """
+    sources = [Ticket.objects.all()]
+    if wants_archived(request):
+        sources.append(ArchivedTicket.objects.all())
+    
     # Total ticket count
-    total_tickets = Ticket.objects.count()
+    total_tickets = sum(queryset.count() for queryset in sources)
     
     # Open ticket count
-    open_tickets = Ticket.objects.filter(status='open').count()
+    open_tickets = sum(queryset.filter(status='open').count() for queryset in sources)
     
     # Calculate average tickets per day
-    earliest = Ticket.objects.aggregate(Min('created_at'))['created_at__min']
+    earliest = min(
+        (
+            first for first in (
+                queryset.aggregate(Min('created_at'))['created_at__min'] for queryset in sources
+            )
+            if first
+        ),
+        default=None
+    )
     if earliest:
         days = (timezone.now() - earliest).days + 1
         avg_per_day = total_tickets / days
@@ -99,18 +392,10 @@ def ticket_stats(request):
         avg_per_day = 0
     
     # Priority breakdown using aggregation
-    priority_breakdown = dict(
-        Ticket.objects.values('priority')
-        .annotate(count=Count('id'))
-        .values_list('priority', 'count')
-    )
+    priority_breakdown = breakdown(sources, 'priority')
     
     # Category breakdown using aggregation
-    category_breakdown = dict(
-        Ticket.objects.values('category')
-        .annotate(count=Count('id'))
-        .values_list('category', 'count')
-    )
+    category_breakdown = breakdown(sources, 'category')
     
     return Response({
         'total_tickets': total_tickets,
@@ -151,3 +436,49 @@ def classify_ticket(request):
                 'note': 'Using default values (LLM unavailable)'
             }
         )
+
+
+@api_view(['POST'])
+def batch_operations(request):
+    """
+    Run several API operations in one round-trip (POST /api/batch/).
+    Body: {"operations": [{"id", "method", "path", "body", "headers"}, ...], "atomic": false}.
+    Returns {"results": [{"id", "status", "body", "headers"}, ...], "committed": bool}
+    in operation order.
+    """
+    try:
+        operations, atomic = batch.parse_operations(request.data)
+    except batch.BatchError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    results, committed = batch.run_batch(request, operations, atomic, batch_view=batch_operations)
+    return Response({'results': results, 'committed': committed})
+
+
+@api_view(['GET'])
+def llm_usage_summary(request):
+    """
+    Summarize the LLM usage ledger (GET /api/llm-usage/?hours=24&bucket_minutes=60):
+    latency percentiles, tokens per ticket and failure rates, overall, per model and per interval.
+    """
+    try:
+        hours = float(request.query_params.get('hours', 24))
+        bucket_minutes = float(request.query_params.get('bucket_minutes', 60))
+    except ValueError:
+        return Response({'error': 'hours and bucket_minutes must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 < hours <= 24 * 90 or bucket_minutes <= 0 or hours * 60 / bucket_minutes > 1000:
+        return Response(
+            {'error': 'hours must be within 90 days and give at most 1000 intervals'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(usage.summarize(window=timedelta(hours=hours), bucket=timedelta(minutes=bucket_minutes)))
+
+
+def metrics_view(request):
+    """
+    Expose process metrics in Prometheus text format.
+    Plain Django view so scrapers don't go through DRF content negotiation.
+    """
+    return HttpResponse(
+        metrics.REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,56 @@
+"""
+Work queue for support agents.
+Atomically claims the most urgent, oldest open ticket and moves it to in_progress,
+so concurrent agents never receive the same ticket.
+"""
+from django.db import connections, router, transaction
+from django.db.models import F
+
+from . import list_cache
+from .models import Ticket
+
+
+def open_queue():
+    """Open tickets in claim order; matches the ticket_open_queue_idx partial index."""
+    return Ticket.objects.filter(status='open').order_by('priority_rank', 'created_at')
+
+
+class ClaimContention(Exception):
+    """Every attempt lost the race for an open ticket; the queue is not empty, retry shortly."""
+
+
+def claim_next_ticket(max_attempts=10):
+    """
+    Claim the next ticket and return it, or None if the queue is empty. Raises
+    ClaimContention if open tickets remain but other claimers won all
+    `max_attempts` races for them.
+
+    On databases with SKIP LOCKED (PostgreSQL) the candidate row is locked with
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent claimers each take a different
+    row without waiting on each other. Elsewhere the status change is a
+    compare-and-set UPDATE ... WHERE status='open', retried on the next candidate
+    when another claimer won the race.
+    """
+    using = router.db_for_write(Ticket)
+    skip_locked = connections[using].features.has_select_for_update_skip_locked
+
+    for _attempt in range(max_attempts):
+        with transaction.atomic(using=using):
+            queryset = open_queue().using(using)
+            if skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            ticket = queryset.first()
+            if ticket is None:
+                return None
+            claimed = (
+                Ticket.objects.using(using)
+                .filter(pk=ticket.pk, status='open')
+                .update(status='in_progress', version=F('version') + 1)
+            )
+        if claimed:
+            # update() sends no signals, so invalidate cached lists here
+            list_cache.bump_generation()
+            ticket.status = 'in_progress'
+            ticket.version += 1
+            return ticket
+    raise ClaimContention(f'Lost the race for an open ticket {max_attempts} times')